@@ -0,0 +1,100 @@
+import io
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+
+from functions import (
+    COLUMN_NAME_PATTERN,
+    FORBIDDEN_CHARS,
+    PANDAS_NA_VALUES,
+    SCAN_FIRST_BLOCK,
+    SCAN_MAX_BLOCK,
+)
+
+# Bytes read up front to infer column types
+SCHEMA_PREFIX_BYTES = 1024**2
+
+
+def _is_temporal(arrow_type):
+    return (
+        pa.types.is_date(arrow_type)
+        or pa.types.is_time(arrow_type)
+        or pa.types.is_timestamp(arrow_type)
+    )
+
+
+def read_csv_arrow(file, sep, enc):
+    """
+    Parse a CSV file with pyarrow's multithreaded reader into a DataFrame of
+    Arrow-backed columns. Columns pyarrow would infer as dates, times or
+    timestamps are kept as text so the format checks see the original values.
+    """
+    read_options = pa_csv.ReadOptions(encoding=enc, use_threads=True)
+    parse_options = pa_csv.ParseOptions(delimiter=sep)
+    convert_options = pa_csv.ConvertOptions(
+        null_values=PANDAS_NA_VALUES, strings_can_be_null=True
+    )
+    try:
+        # Infer the schema from a prefix of whole lines to find temporal columns
+        start = file.tell()
+        prefix = file.read(SCHEMA_PREFIX_BYTES)
+        file.seek(start)
+        if len(prefix) == SCHEMA_PREFIX_BYTES and b"\n" in prefix:
+            prefix = prefix[: prefix.rindex(b"\n") + 1]
+        schema = pa_csv.read_csv(
+            io.BytesIO(prefix), read_options, parse_options, convert_options
+        ).schema
+        convert_options.column_types = {
+            field.name: pa.string() for field in schema if _is_temporal(field.type)
+        }
+        table = pa_csv.read_csv(file, read_options, parse_options, convert_options)
+    except pa.ArrowInvalid as e:
+        raise pd.errors.ParserError(str(e)) from e
+
+    # Columns that were null in the first block may still be inferred as temporal
+    for i, field in enumerate(table.schema):
+        if _is_temporal(field.type):
+            table = table.set_column(i, field.name, pc.cast(table[i], pa.string()))
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def arrow_column_matches(values, pattern):
+    """
+    column_matches for Arrow-backed string columns, evaluated with the
+    pyarrow.compute regex kernel over zero-copy slices.
+    """
+    array = pa.chunked_array(pa.array(values))
+    start, block = 0, SCAN_FIRST_BLOCK
+    while start < len(array):
+        matched = pc.match_substring_regex(array.slice(start, block), pattern)
+        if not pc.all(matched, skip_nulls=True).as_py():
+            return False
+        start += block
+        block = min(block * 2, SCAN_MAX_BLOCK)
+    return True
+
+
+def arrow_pattern_mismatches(values, pattern):
+    """
+    pattern_mismatches for Arrow-backed string columns, in one pyarrow.compute pass.
+    """
+    matched = pc.match_substring_regex(pa.chunked_array(pa.array(values)), pattern)
+    return pc.invert(matched).fill_null(False).to_numpy(zero_copy_only=False)
+
+
+def check_column_names_arrow(columns):
+    """
+    check_column_names evaluated with pyarrow.compute over all names at once.
+    """
+    names = pa.array([str(col) for col in columns])
+    forbidden = pc.match_substring_regex(names, FORBIDDEN_CHARS).to_pylist()
+    conforming = pc.match_substring_regex(names, COLUMN_NAME_PATTERN).to_pylist()
+    issues = {}
+    for col, has_forbidden, is_conforming in zip(columns, forbidden, conforming):
+        if has_forbidden:
+            issues[col] = "Contains spaces, hyphens, or special characters."
+        elif not is_conforming:
+            issues[col] = "Contains characters outside of alphanumeric and underscores."
+    return issues
@@ -0,0 +1,400 @@
+"""
+Run the data quality checks over many files without the Streamlit app.
+
+Example:
+    python batch_check.py deliveries/cruise_42 "archive/**/*.csv" -o reports --sep ";"
+
+Per-check timings are included in each JSON report. To forward them to a
+metrics pipeline, register a module-level hook before calling main(); it is
+installed in every worker process:
+
+    import batch_check
+    from instrumentation import register_metrics_hook
+    from my_metrics import send_record
+
+    register_metrics_hook(send_record)
+    batch_check.main()
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+from functions import (
+    AUTO,
+    is_csv,
+    list_excel_sheets,
+    load_data,
+    load_excel_sheets,
+    resolve_format,
+    results_to_records,
+    run_checks,
+)
+from duplicates import (
+    DEFAULT_NEAR_DISTANCE_M,
+    DEFAULT_NEAR_SECONDS,
+    duplicate_records,
+    find_duplicates,
+)
+from incremental import run_incremental_checks
+from instrumentation import METRICS_HOOKS, Profiler, profiling, stage
+from missing import count_missing, marker_records, parse_markers
+from plausibility import DEFAULT_MAX_SPEED_KNOTS, check_plausibility, plausibility_records
+from rules import compile_rules, evaluate_plan, load_rule_set
+from streaming import DEFAULT_CHUNKSIZE, run_streaming_checks
+from violations import MAX_SAMPLE_ROWS
+
+SUPPORTED_EXTENSIONS = (".csv", ".xls", ".xlsx")
+
+
+def find_files(patterns):
+    """
+    Expand directories, glob patterns and file paths into a sorted list of data files.
+    """
+    files = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            candidates = glob.glob(os.path.join(pattern, "**", "*"), recursive=True)
+        else:
+            candidates = glob.glob(pattern, recursive=True)
+        files.update(
+            path
+            for path in candidates
+            if os.path.isfile(path) and path.lower().endswith(SUPPORTED_EXTENSIONS)
+        )
+    return sorted(files)
+
+
+def report_names(files):
+    """
+    Name each file's report after its path relative to the directory shared
+    by all files, so files of the same name in different directories get
+    separate reports.
+    """
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in files])
+    return {path: os.path.relpath(os.path.abspath(path), root) for path in files}
+
+
+def check_table(df, rule_set=None, markers=None, near_tolerances=None, max_speed=None):
+    """
+    Run the check suite on a loaded table, plus the rules of `rule_set`, a
+    count of the missing value `markers`, a search for duplicates with
+    `near_tolerances` (distance in metres, seconds) and a position
+    plausibility check with ship speeds up to `max_speed` knots if given.
+    """
+    results = run_checks(df)
+    if rule_set is not None:
+        plan = compile_rules(rule_set, df.columns)
+        results["rule_findings"] = evaluate_plan(plan, df)[0]
+    if markers is not None:
+        results["marker_findings"] = marker_records(count_missing(df, markers)[0])
+    if near_tolerances is not None:
+        duplicates = find_duplicates(df, *near_tolerances)
+        results["duplicate_findings"] = duplicate_records(duplicates, *near_tolerances)
+    if max_speed is not None:
+        plausibility = check_plausibility(df, max_speed)
+        results["plausibility_findings"] = plausibility_records(plausibility, max_speed)
+    return results
+
+
+def check_file(
+    path,
+    output_dir,
+    sep,
+    enc,
+    fmt="json",
+    chunksize=None,
+    trace_memory=False,
+    engine="pandas",
+    state_dir=None,
+    rule_set=None,
+    markers=None,
+    near_tolerances=None,
+    max_speed=None,
+    report_name=None,
+):
+    """
+    Run the check suite on one file, or on every sheet of an Excel workbook,
+    and write one report per table to `output_dir`. Returns a summary row per
+    table. Meant to be called in a worker process. With `state_dir`, CSV
+    files that grew by appended rows since the last run only have the new
+    rows checked. `rule_set` adds custom rules, `markers` a count of
+    placeholder values, `near_tolerances` a search for duplicates and
+    `max_speed` a position plausibility check to tables loaded in full.
+    Reports are named after `report_name`, by default the file name.
+    """
+    with profiling(Profiler(trace_memory)) as profiler, stage("check_file"):
+        with open(path, "rb") as file:
+            sep, enc = resolve_format(file, sep, enc)
+            if is_csv(path):
+                if state_dir:
+                    tables = {
+                        None: run_incremental_checks(
+                            file,
+                            sep,
+                            enc,
+                            state_dir,
+                            chunksize or DEFAULT_CHUNKSIZE,
+                            name=os.path.abspath(path),
+                        )
+                    }
+                elif chunksize:
+                    tables = {None: run_streaming_checks(file, sep, enc, chunksize)}
+                else:
+                    df, error = load_data(file, sep, enc, engine=engine)
+                    tables = {
+                        None: (check_table(df, rule_set, markers, near_tolerances, max_speed) if error is None else None, error)
+                    }
+            else:
+                # Files are already spread over processes, so sheets load serially
+                sheets = load_excel_sheets(file, list_excel_sheets(file), max_workers=1)
+                tables = {
+                    sheet: (check_table(df, rule_set, markers, near_tolerances, max_speed) if error is None else None, error)
+                    for sheet, (df, error) in sheets.items()
+                }
+
+    return [
+        write_report(path, sheet, results, error, sep, enc, output_dir, fmt, profiler, report_name)
+        for sheet, (results, error) in tables.items()
+    ]
+
+
+def write_report(
+    path, sheet, results, error, sep, enc, output_dir, fmt, profiler, report_name=None
+):
+    """
+    Write the report for one file or sheet and return its summary row.
+    Reports of files in subdirectories go to the same subdirectories of
+    `output_dir`.
+    """
+    records = results_to_records(results) if results is not None else []
+    name = report_name or Path(path).name
+    if sheet is not None:
+        name = f"{name}.{sheet}"
+    report_path = Path(output_dir) / f"{name}.report.{fmt}"
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    if fmt == "parquet":
+        pd.DataFrame(
+            records, columns=["check", "column", "status", "detail"]
+        ).to_parquet(report_path, index=False)
+    else:
+        violations = (results or {}).get("coordinate_violations") or {}
+        report = {
+            "file": str(path),
+            "sheet": sheet,
+            "separator": sep,
+            "encoding": enc,
+            "n_rows": results["n_rows"] if results is not None else None,
+            # Rows parsed in this run; fewer than n_rows when only appended rows were checked
+            "rows_parsed": results.get("rows_parsed", results["n_rows"])
+            if results is not None
+            else None,
+            "error": error,
+            "findings": records,
+            # Counts, with the positions of the first failing rows of each kind
+            "coordinate_violations": {
+                kind: {"count": len(rows), "first_rows": rows.rows(0, MAX_SAMPLE_ROWS).tolist()}
+                for kind, rows in violations.items()
+            },
+            "metrics": profiler.records,
+        }
+        with open(report_path, "w", encoding="utf-8") as out:
+            json.dump(report, out, ensure_ascii=False, indent=2)
+
+    return {
+        "file": str(path),
+        "sheet": sheet,
+        "report": str(report_path),
+        "n_rows": results["n_rows"] if results is not None else None,
+        "n_issues": sum(record["status"] == "issue" for record in records),
+        "seconds": profiler.records[0]["seconds"],
+        "error": error,
+    }
+
+
+def install_metrics_hooks(hooks):
+    """
+    Register the parent process' metrics hooks in a worker process.
+    """
+    for hook in hooks:
+        if hook not in METRICS_HOOKS:
+            METRICS_HOOKS.append(hook)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run the data quality checks over a directory or glob of CSV/Excel files."
+    )
+    parser.add_argument(
+        "paths", nargs="+", help="Directories, glob patterns or files to check."
+    )
+    parser.add_argument(
+        "-o", "--output-dir", default="reports", help="Where to write the reports."
+    )
+    parser.add_argument(
+        "--sep", default=AUTO, help="CSV separator (default: detected per file)."
+    )
+    parser.add_argument(
+        "--encoding", default=AUTO, help="File encoding (default: detected per file)."
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["pandas", "pyarrow"],
+        default="pandas",
+        help="CSV parser; pyarrow is multithreaded and uses less memory.",
+    )
+    parser.add_argument(
+        "--format", choices=["json", "parquet"], default="json", help="Report format."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of worker processes (default: one per CPU).",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=None,
+        help="Stream CSV files in chunks of this many rows instead of loading them whole.",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Record peak memory per check in the reports (slower).",
+    )
+    parser.add_argument(
+        "--rules",
+        help="JSON or YAML rule set to evaluate on every file in addition to the built-in checks.",
+    )
+    parser.add_argument(
+        "--state-dir",
+        help="Keep per-file check state here and only check rows appended to CSV files since the last run.",
+    )
+    parser.add_argument(
+        "--missing-markers",
+        help='Comma-separated placeholders that mean "no value", such as "-999, 9999, N.D., blank"; reports how often each occurs. Cells that are exactly "NA", "nan" or empty are read as nulls and not counted as markers.',
+    )
+    parser.add_argument(
+        "--duplicates",
+        action="store_true",
+        help="Report rows repeated exactly and positions that are near-duplicates.",
+    )
+    parser.add_argument(
+        "--near-distance",
+        type=float,
+        default=DEFAULT_NEAR_DISTANCE_M,
+        help=f"Near-duplicate distance in metres (default: {DEFAULT_NEAR_DISTANCE_M:g}).",
+    )
+    parser.add_argument(
+        "--near-seconds",
+        type=float,
+        default=DEFAULT_NEAR_SECONDS,
+        help=f"Near-duplicate time window in seconds (default: {DEFAULT_NEAR_SECONDS:g}).",
+    )
+    parser.add_argument(
+        "--plausibility",
+        action="store_true",
+        help="Report positions on land and moves between consecutive positions faster than --max-speed.",
+    )
+    parser.add_argument(
+        "--max-speed",
+        type=float,
+        default=DEFAULT_MAX_SPEED_KNOTS,
+        help=f"Maximum plausible ship speed in knots (default: {DEFAULT_MAX_SPEED_KNOTS:g}).",
+    )
+    args = parser.parse_args(argv)
+    if args.near_distance <= 0 or args.near_seconds <= 0:
+        parser.error("--near-distance and --near-seconds must be positive")
+    if args.max_speed <= 0:
+        parser.error("--max-speed must be positive")
+    for option in ("rules", "missing_markers", "duplicates", "plausibility"):
+        if getattr(args, option) and (args.chunksize or args.state_dir):
+            parser.error(
+                f"--{option.replace('_', '-')} needs whole files and cannot be combined with --chunksize or --state-dir"
+            )
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    files = find_files(args.paths)
+    if not files:
+        print("No CSV or Excel files found.", file=sys.stderr)
+        return 1
+    try:
+        rule_set = load_rule_set(args.rules) if args.rules else None
+    except (OSError, ValueError) as e:
+        print(f"Could not read the rule set: {e}", file=sys.stderr)
+        return 1
+    os.makedirs(args.output_dir, exist_ok=True)
+    names = report_names(files)
+
+    summary = []
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        initializer=install_metrics_hooks,
+        initargs=(list(METRICS_HOOKS),),
+    ) as executor:
+        futures = {
+            executor.submit(
+                check_file,
+                path,
+                args.output_dir,
+                args.sep,
+                args.encoding,
+                args.format,
+                args.chunksize,
+                args.trace_memory,
+                args.engine,
+                args.state_dir,
+                rule_set,
+                parse_markers(args.missing_markers) if args.missing_markers else None,
+                (args.near_distance, args.near_seconds) if args.duplicates else None,
+                args.max_speed if args.plausibility else None,
+                names[path],
+            ): path
+            for path in files
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                rows = future.result()
+            except Exception as e:
+                rows = [
+                    {
+                        "file": futures[future],
+                        "sheet": None,
+                        "report": None,
+                        "n_rows": None,
+                        "n_issues": None,
+                        "seconds": None,
+                        "error": str(e),
+                    }
+                ]
+            summary.extend(rows)
+            for row in rows:
+                table = row["file"]
+                if row["sheet"] is not None:
+                    table += f" [{row['sheet']}]"
+                status = row["error"] or f"{row['n_issues']} issues"
+                print(f"[{done}/{len(files)}] {table}: {status}")
+
+    summary.sort(key=lambda row: (row["file"], str(row["sheet"])))
+    summary_path = Path(args.output_dir) / f"summary.{args.format}"
+    if args.format == "parquet":
+        pd.DataFrame(summary).to_parquet(summary_path, index=False)
+    else:
+        with open(summary_path, "w", encoding="utf-8") as out:
+            json.dump(summary, out, ensure_ascii=False, indent=2)
+    print(f"Summary written to {summary_path}")
+    return 1 if any(row["error"] for row in summary) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
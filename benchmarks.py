@@ -0,0 +1,378 @@
+"""
+Benchmark the data quality checks on seeded synthetic oceanographic tables.
+
+Examples:
+    python benchmarks.py --rows 10000 100000 1000000 --save-baseline
+    python benchmarks.py --rows 10000 100000 1000000 --threshold 0.25
+
+The second run compares against the stored baseline and exits with status 1
+when any check got slower or used more memory than the threshold allows.
+
+    python benchmarks.py --import-budget 1.5
+
+checks instead that every startup module imports within 1.5 seconds in a
+fresh interpreter without loading the map stack.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from functions import (
+    check_column_names,
+    check_coordinates,
+    check_data_types,
+    check_date_format,
+    check_missing_values,
+    check_time_format,
+    load_data,
+    run_checks,
+)
+from compaction import compact_frame
+from duplicates import find_duplicates
+from missing import count_missing
+from plausibility import check_plausibility
+from streaming import run_streaming_checks
+
+DEFAULT_BASELINE = "benchmark_baseline.json"
+
+# Slowdowns smaller than this many seconds are treated as timer noise
+TIME_NOISE_FLOOR = 0.001
+
+# Modules the app and batch workers import on startup, and the dependencies
+# they must leave to be imported on first use
+STARTUP_MODULES = ["functions", "streaming", "sampling", "cache", "mapping", "batch_check"]
+LAZY_MODULES = ["folium", "leafmap"]
+
+# Rows generated and written to the benchmark CSV at a time
+DATASET_CHUNK_ROWS = 1_000_000
+
+# Largest table loaded into memory for load_data and the frame checks;
+# larger tables only run the streaming checks
+DEFAULT_MAX_FRAME_ROWS = 10_000_000
+
+# Checks and stages that take a DataFrame; load_data and streaming are benchmarked from a CSV file
+FRAME_CHECKS = {
+    "check_column_names": check_column_names,
+    "check_missing_values": check_missing_values,
+    "check_data_types": check_data_types,
+    "check_date_format": check_date_format,
+    "check_time_format": check_time_format,
+    "check_coordinates": check_coordinates,
+    "run_checks": run_checks,
+    "compact_frame": compact_frame,
+    "count_missing": count_missing,
+    "find_duplicates": find_duplicates,
+    "check_plausibility": check_plausibility,
+}
+
+
+def make_dataset(n_rows, n_extra_cols=0, null_rate=0.0, invalid_rate=0.0, seed=0):
+    """
+    Generate a CTD-style table with station, date, time, position and
+    measurement columns, plus `n_extra_cols` alternating text and numeric
+    columns. `null_rate` blanks that fraction of measurement and text cells
+    and `invalid_rate` corrupts that fraction of dates, times and positions.
+    """
+    rng = np.random.default_rng(seed)
+    stations = np.array([f"ST{i:03d}" for i in range(200)])
+    timestamps = np.datetime64("2020-01-01T00:00:00") + rng.integers(
+        0, 5 * 365 * 86400, n_rows
+    ).astype("timedelta64[s]")
+    stamps = pd.Series(np.datetime_as_string(timestamps, unit="s"))
+    df = pd.DataFrame(
+        {
+            "Station": stations[rng.integers(0, len(stations), n_rows)],
+            "Date": stamps.str.slice(0, 10),
+            "Time": stamps.str.slice(11, 19),
+            "Latitude": rng.uniform(-47, -25, n_rows).round(5),
+            "Longitude": rng.uniform(10, 40, n_rows).round(5),
+            "Depth_m": rng.uniform(0, 5000, n_rows).round(1),
+            "Temperature_C": rng.normal(12, 5, n_rows).round(3),
+            "Salinity_psu": rng.normal(35, 0.5, n_rows).round(3),
+            "Flag": rng.integers(0, 4, n_rows),
+        }
+    )
+    for i in range(n_extra_cols):
+        if i % 2:
+            df[f"Extra_{i}"] = rng.normal(size=n_rows).round(4)
+        else:
+            df[f"Extra_{i}"] = stations[rng.integers(0, len(stations), n_rows)]
+
+    if invalid_rate:
+        for col, bad_value in (
+            ("Date", "2020/01/01"),
+            ("Time", "1200"),
+            ("Latitude", 95.0),
+            ("Longitude", 200.0),
+        ):
+            df.loc[rng.random(n_rows) < invalid_rate, col] = bad_value
+    if null_rate:
+        for col in df.columns.drop(["Date", "Time", "Latitude", "Longitude"]):
+            df.loc[rng.random(n_rows) < null_rate, col] = np.nan
+    return df
+
+
+def write_dataset(path, n_rows, n_extra_cols=0, null_rate=0.0, invalid_rate=0.0, seed=0, keep=True):
+    """
+    Generate the table in chunks of DATASET_CHUNK_ROWS rows, each from its own
+    seed, and write it to the CSV file `path` chunk by chunk, so tables larger
+    than memory can be written. Returns the whole table when `keep` is set.
+    """
+    chunks = []
+    for number, start in enumerate(range(0, n_rows, DATASET_CHUNK_ROWS)):
+        chunk = make_dataset(
+            min(DATASET_CHUNK_ROWS, n_rows - start), n_extra_cols, null_rate, invalid_rate, seed + number
+        )
+        chunk.to_csv(path, mode="a" if number else "w", header=not number, index=False)
+        if keep:
+            chunks.append(chunk)
+    return pd.concat(chunks, ignore_index=True) if keep else None
+
+
+def frame_digest(df):
+    """
+    Hash every cell and label of `df`, to tell whether a check changed it.
+    """
+    return pd.util.hash_pandas_object(df).to_numpy(), tuple(df.columns), tuple(df.dtypes)
+
+
+def measure(func, *args, repeat=3):
+    """
+    Return the best wall time in seconds of `repeat` calls of `func(*args)`
+    and the peak traced memory in bytes of one more call. Tracing slows every
+    allocation down, so the timed calls run untraced.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        func(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def run_benchmarks(
+    rows, widths, null_rates, invalid_rates, repeat=3, seed=0, max_frame_rows=DEFAULT_MAX_FRAME_ROWS
+):
+    """
+    Benchmark every check over the grid of dataset parameters. Tables of more
+    than `max_frame_rows` rows only run the streaming checks, as the other
+    checks need the whole table in memory.
+    Returns a dictionary of {case name: {"seconds": ..., "peak_bytes": ...}};
+    checks that changed the DataFrame they were given are marked with
+    "modified_input".
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "bench.csv"
+        for n_rows in rows:
+            for width in widths:
+                for null_rate in null_rates:
+                    for invalid_rate in invalid_rates:
+                        params = (path, n_rows, width, null_rate, invalid_rate, seed)
+                        results.update(run_cases(params, repeat, n_rows <= max_frame_rows))
+    return results
+
+
+def run_cases(params, repeat, in_memory):
+    """
+    Write the table described by `params`, the arguments of write_dataset, and
+    benchmark the checks on it; with `in_memory`, also load_data and the
+    FRAME_CHECKS.
+    """
+    path, n_rows, _, null_rate, invalid_rate, _ = params
+    df = write_dataset(*params, keep=in_memory)
+    n_cols = len(pd.read_csv(path, nrows=0).columns)
+    case = f"rows={n_rows},cols={n_cols},nulls={null_rate},invalid={invalid_rate}"
+
+    def read(check, **kwargs):
+        with open(path, "rb") as file:
+            return check(file, ",", "utf-8", **kwargs)
+
+    cases = {"run_streaming_checks": lambda: read(run_streaming_checks)}
+    if in_memory:
+        cases["load_data"] = lambda: read(load_data)
+        cases["load_data_pyarrow"] = lambda: read(load_data, engine="pyarrow")
+        for name, check in FRAME_CHECKS.items():
+            cases[name] = lambda check=check: check(df)
+        # Checks share the loaded frame in the app, so none may change it
+        digest = frame_digest(df)
+
+    results = {}
+    for name, func in cases.items():
+        seconds, peak = measure(func, repeat=repeat)
+        result = results[f"{name}[{case}]"] = {
+            "seconds": seconds,
+            "peak_bytes": peak,
+            "rows_per_second": n_rows / seconds if seconds else None,
+        }
+        if name in FRAME_CHECKS:
+            after = frame_digest(df)
+            if not all(np.array_equal(a, b) for a, b in zip(digest, after)):
+                result["modified_input"] = True
+                df = write_dataset(*params)
+        print(f"{name:<22} {case:<50} {seconds:9.4f}s {peak / 1024**2:9.1f} MiB")
+    return results
+
+
+def measure_import(module):
+    """
+    Import `module` in a fresh interpreter. Returns the import time in seconds
+    and the LAZY_MODULES it loaded.
+    """
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "seconds = time.perf_counter() - start\n"
+        f"print(json.dumps([seconds, [m for m in {LAZY_MODULES!r} if m in sys.modules]]))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=Path(__file__).parent,
+    ).stdout
+    seconds, loaded = json.loads(output.splitlines()[-1])
+    return seconds, loaded
+
+
+def check_import_budget(modules, budget):
+    """
+    List the modules that take longer than `budget` seconds to import or
+    load any of the LAZY_MODULES.
+    """
+    violations = []
+    for module in modules:
+        seconds, loaded = measure_import(module)
+        print(f"import {module:<20} {seconds:9.4f}s")
+        if seconds > budget:
+            violations.append(f"{module}: import took {seconds:.3f}s > {budget:.3f}s")
+        if loaded:
+            violations.append(f"{module}: imports {', '.join(loaded)} on startup")
+    return violations
+
+
+def find_regressions(results, baseline, threshold):
+    """
+    List the cases whose time or peak memory exceeds the baseline by more than `threshold`.
+    """
+    regressions = []
+    for key, current in results.items():
+        if key not in baseline:
+            continue
+        for metric in ("seconds", "peak_bytes"):
+            allowed = baseline[key][metric] * (1 + threshold)
+            if metric == "seconds":
+                allowed = max(allowed, baseline[key][metric] + TIME_NOISE_FLOOR)
+            if current[metric] > allowed:
+                regressions.append(
+                    f"{key}: {metric} {current[metric]:.4g} > {allowed:.4g} (baseline {baseline[key][metric]:.4g})"
+                )
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--rows",
+        type=int,
+        nargs="+",
+        default=[10_000, 100_000, 1_000_000],
+        help="Row counts to generate (up to 1e8; see --max-frame-rows).",
+    )
+    parser.add_argument(
+        "--max-frame-rows",
+        type=int,
+        default=DEFAULT_MAX_FRAME_ROWS,
+        help="Larger tables are only written to disk and run the streaming checks.",
+    )
+    parser.add_argument(
+        "--widths", type=int, nargs="+", default=[0, 50], help="Extra columns to add."
+    )
+    parser.add_argument(
+        "--null-rates", type=float, nargs="+", default=[0.0, 0.1], help="Null densities."
+    )
+    parser.add_argument(
+        "--invalid-rates",
+        type=float,
+        nargs="+",
+        default=[0.0, 0.01],
+        help="Fractions of invalid dates, times and positions.",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case; the best time is kept.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the generators.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline file.")
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="Store these results as the baseline."
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Allowed relative slowdown or memory growth before failing.",
+    )
+    parser.add_argument("--output", help="Also write the results to this JSON file.")
+    parser.add_argument(
+        "--import-budget",
+        type=float,
+        help="Only check that each startup module imports within this many seconds.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.import_budget is not None:
+        violations = check_import_budget(STARTUP_MODULES, args.import_budget)
+        for violation in violations:
+            print(f"OVER BUDGET {violation}")
+        return 1 if violations else 0
+
+    results = run_benchmarks(
+        args.rows,
+        args.widths,
+        args.null_rates,
+        args.invalid_rates,
+        args.repeat,
+        args.seed,
+        args.max_frame_rows,
+    )
+    modified = [key for key, result in results.items() if result.get("modified_input")]
+    for key in modified:
+        print(f"MODIFIED INPUT {key}")
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+    if args.save_baseline:
+        Path(args.baseline).write_text(json.dumps(results, indent=2))
+        print(f"Baseline saved to {args.baseline}")
+        return 1 if modified else 0
+    if not Path(args.baseline).exists():
+        print(f"No baseline at {args.baseline}; run with --save-baseline first.")
+        return 1 if modified else 0
+
+    regressions = find_regressions(
+        results, json.loads(Path(args.baseline).read_text()), args.threshold
+    )
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions or modified else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
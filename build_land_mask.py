@@ -0,0 +1,122 @@
+"""
+Build the land/sea raster used by the plausibility checks from TopoJSON land
+polygons. By default the Natural Earth 1:110m land shipped with bqplot is used:
+
+    python build_land_mask.py
+    python build_land_mask.py path/to/land-50m.json --resolution 0.05
+
+The raster is stored as packed bits in data/land_mask.npz and read offline.
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from plausibility import DEFAULT_RESOLUTION, LAND_MASK_PATH
+
+
+def default_source():
+    """
+    Return the world TopoJSON that ships with bqplot.
+    """
+    import bqplot
+
+    return Path(bqplot.__file__).parent / "map_data" / "WorldMap.json"
+
+
+def decode_arcs(topology):
+    """
+    Return the arcs of a quantized TopoJSON topology as arrays of lon/lat points.
+    """
+    scale = np.array(topology["transform"]["scale"])
+    translate = np.array(topology["transform"]["translate"])
+    return [
+        np.cumsum(np.array(arc, dtype=float), axis=0) * scale + translate
+        for arc in topology["arcs"]
+    ]
+
+
+def ring_points(ring, arcs):
+    """
+    Join the arcs of a ring, reversing those given by negative (~) indices.
+    """
+    parts = []
+    for index in ring:
+        arc = arcs[index] if index >= 0 else arcs[~index][::-1]
+        # Consecutive arcs share their end point
+        parts.append(arc if not parts else arc[1:])
+    return np.concatenate(parts)
+
+
+def land_polygons(topology, name="land"):
+    """
+    Yield each polygon of the named object as a list of rings, outer ring first.
+    """
+    arcs = decode_arcs(topology)
+    geometry = topology["objects"][name]
+    geometries = geometry.get("geometries", [geometry])
+    for geometry in geometries:
+        polygons = geometry["arcs"] if geometry["type"] == "MultiPolygon" else [geometry["arcs"]]
+        for polygon in polygons:
+            yield [ring_points(ring, arcs) for ring in polygon]
+
+
+def close_around_pole(ring):
+    """
+    Close a ring that circles a pole, such as Antarctica's, which jumps from
+    one side of the antimeridian to the other, by running it along the
+    antimeridian and through the pole instead.
+    """
+    jumps = np.flatnonzero(np.abs(np.diff(ring[:, 0])) > 180)
+    if not len(jumps):
+        return ring
+    i = jumps[0]
+    edge = 180 * np.sign(ring[i, 0])
+    pole = -90 if ring[:, 1].mean() < 0 else 90
+    detour = [[edge, ring[i, 1]], [edge, pole], [-edge, pole], [-edge, ring[i + 1, 1]]]
+    return np.concatenate([ring[: i + 1], detour, ring[i + 1 :]])
+
+
+def rasterize(topology, resolution=DEFAULT_RESOLUTION):
+    """
+    Rasterize the land polygons onto a global grid of `resolution` degrees,
+    row 0 at the north pole and column 0 at 180°W. Holes such as large lakes
+    are cleared again after their polygon is filled.
+    """
+    width, height = round(360 / resolution), round(180 / resolution)
+    image = Image.new("1", (width, height), 0)
+    draw = ImageDraw.Draw(image)
+    for rings in land_polygons(topology):
+        for number, ring in enumerate(rings):
+            ring = close_around_pole(ring)
+            pixels = np.column_stack(
+                [(ring[:, 0] + 180) / resolution, (90 - ring[:, 1]) / resolution]
+            )
+            draw.polygon([tuple(p) for p in pixels], fill=0 if number else 1)
+    return np.array(image, dtype=bool)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the land/sea raster.")
+    parser.add_argument("source", nargs="?", help="TopoJSON file with a 'land' object.")
+    parser.add_argument(
+        "--resolution", type=float, default=DEFAULT_RESOLUTION, help="Cell size in degrees."
+    )
+    parser.add_argument("-o", "--output", default=LAND_MASK_PATH, help="Where to write the raster.")
+    args = parser.parse_args(argv)
+
+    source = Path(args.source) if args.source else default_source()
+    land = rasterize(json.loads(source.read_text()), args.resolution)
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(
+        args.output, bits=np.packbits(land), shape=land.shape, resolution=args.resolution
+    )
+    print(f"{land.mean():.1%} of {land.size:,} cells are land; written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+from functions import find_coordinate_columns
+from instrumentation import instrumented
+
+# Text columns with at most this many distinct values per row become categoricals
+CATEGORY_MAX_RATIO = 0.2
+
+
+def compact_column(values, category_max_ratio=CATEGORY_MAX_RATIO):
+    """
+    Return a column in the smallest dtype that holds exactly the same values:
+    integers downcast to the narrowest integer type, floats to float32 when
+    every value survives the round trip, and low-cardinality text as a
+    categorical. Arrow-backed and other extension columns are left as they are.
+    """
+    dtype = values.dtype
+    if not isinstance(dtype, np.dtype):
+        return values
+    if dtype.kind == "i":
+        return pd.to_numeric(values, downcast="integer")
+    if dtype.kind == "u":
+        return pd.to_numeric(values, downcast="unsigned")
+    if dtype.kind == "f" and dtype.itemsize > 4:
+        narrowed = values.astype(np.float32)
+        if np.array_equal(
+            narrowed.to_numpy(dtype=dtype), values.to_numpy(), equal_nan=True
+        ):
+            return narrowed
+        return values
+    if dtype == object and len(values):
+        if values.nunique() <= category_max_ratio * len(values):
+            return values.astype("category")
+    return values
+
+
+@instrumented
+def compact_frame(df, category_max_ratio=CATEGORY_MAX_RATIO):
+    """
+    Shrink a loaded DataFrame column by column without changing any value, so
+    every check gives the same results on the compacted frame. The original
+    dtypes are kept in `attrs["source_dtypes"]` for check_data_types, and
+    coordinate columns are left untouched for the range checks.
+    Returns the compacted frame and a report of the memory saved per column.
+    """
+    skip = set(find_coordinate_columns(df.columns))
+    compacted = pd.DataFrame(
+        {
+            col: df[col] if col in skip else compact_column(df[col], category_max_ratio)
+            for col in df.columns
+        },
+        index=df.index,
+    )
+    compacted.attrs = {
+        **df.attrs,
+        "source_dtypes": df.attrs.get("source_dtypes") or df.dtypes.to_dict(),
+    }
+
+    bytes_before = df.memory_usage(index=False, deep=True)
+    bytes_after = compacted.memory_usage(index=False, deep=True)
+    report = pd.DataFrame(
+        {
+            "column": df.columns,
+            "dtype_before": df.dtypes.astype(str).to_numpy(),
+            "dtype_after": compacted.dtypes.astype(str).to_numpy(),
+            "bytes_before": bytes_before.to_numpy(),
+            "bytes_after": bytes_after.to_numpy(),
+        }
+    )
+    report["bytes_saved"] = report["bytes_before"] - report["bytes_after"]
+    return compacted, report
@@ -0,0 +1,234 @@
+import itertools
+import math
+
+import numpy as np
+import pandas as pd
+
+from functions import (
+    EARTH_RADIUS_M,
+    coordinate_values,
+    find_coordinate_columns,
+    find_time_columns,
+    great_circle_distance,
+    record_times,
+)
+from instrumentation import instrumented
+from violations import RowBitmap
+
+# Fixes closer than this in space and time are reported as near-duplicates
+DEFAULT_NEAR_DISTANCE_M = 100.0
+DEFAULT_NEAR_SECONDS = 60.0
+
+# Packed grid cell keys stay below this to fit in int64
+KEY_LIMIT = 2**62
+
+
+@instrumented
+def exact_duplicates(df):
+    """
+    Find rows that repeat an earlier row in every column. Rows are hashed
+    column by column in vectorized passes; rows sharing a hash are then
+    compared by value, so hash collisions cannot produce false duplicates.
+    Returns a DataFrame with the position of each repeated row and of the
+    first row it repeats.
+    """
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    codes, _ = pd.factorize(hashes)
+    # Codes number the distinct hashes in order of first appearance
+    repeated = pd.Series(codes).duplicated().to_numpy()
+    first_rows = np.flatnonzero(~repeated)
+    rows = np.flatnonzero(repeated)
+    if len(rows):
+        candidates = np.union1d(rows, first_rows[codes[rows]])
+        confirmed = df.iloc[candidates].duplicated().to_numpy()
+        rows = np.intersect1d(rows, candidates[confirmed], assume_unique=True)
+    return pd.DataFrame({"row": rows, "duplicate_of": first_rows[codes[rows]]})
+
+
+def _grid_pairs(cells, wrap):
+    """
+    Return every pair (i, j), i < j, of points in the same or neighbouring
+    cells. `cells` maps each grid dimension to the cell numbers of the points
+    and `wrap` maps periodic dimensions to their number of cells. Cells are
+    packed into one integer key, so each of the neighbouring cells is found
+    for all points at once by a binary search in the sorted keys.
+    """
+    columns = {}
+    sizes = {}
+    for name, values in cells.items():
+        if name in wrap:
+            columns[name], sizes[name] = values, wrap[name]
+            continue
+        # Renumber so that empty stretches between occupied cells shrink to
+        # one cell; neighbours stay neighbours and the key stays small
+        distinct, inverse = np.unique(values, return_inverse=True)
+        dense = np.concatenate([[0], np.cumsum(np.minimum(np.diff(distinct), 2))])
+        columns[name], sizes[name] = dense[inverse], int(dense[-1]) + 1
+    # Coarser cells only add candidates, which are checked afterwards anyway
+    while math.prod(sizes.values()) >= KEY_LIMIT:
+        name = max(sizes, key=sizes.get)
+        columns[name] = columns[name] // 2
+        sizes[name] = (sizes[name] + 1) // 2
+
+    def cell_keys(offset):
+        keys = np.zeros(len(next(iter(columns.values()))), dtype=np.int64)
+        for (name, values), step in zip(columns.items(), offset):
+            shifted = values + step
+            if name in wrap:
+                shifted %= sizes[name]
+            keys = keys * sizes[name] + shifted
+        return keys
+
+    keys = cell_keys((0,) * len(columns))
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    pairs = []
+    for offset in itertools.product((0, 1, -1), repeat=len(columns)):
+        # Half of the neighbourhood: the cell itself and offsets that are
+        # positive in their first non-zero dimension
+        if next((step for step in offset if step), 1) < 0:
+            continue
+        # Searching in key order is much faster: the targets are then
+        # almost sorted too
+        targets = cell_keys(offset)[order]
+        first = np.searchsorted(sorted_keys, targets, side="left")
+        counts = np.searchsorted(sorted_keys, targets, side="right") - first
+        points = np.repeat(order, counts)
+        starts = np.repeat(first - (np.cumsum(counts) - counts), counts)
+        pairs.append(np.column_stack([points, order[np.arange(counts.sum()) + starts]]))
+    pairs = np.concatenate(pairs)
+    # The cell itself pairs each point with itself and in both orders, and
+    # narrow periodic grids reach the same cell from several offsets
+    pairs = np.sort(pairs[pairs[:, 0] != pairs[:, 1]], axis=1)
+    return np.unique(pairs, axis=0)
+
+
+@instrumented
+def near_duplicates(
+    lat, lon, times=None, distance_m=DEFAULT_NEAR_DISTANCE_M, seconds=DEFAULT_NEAR_SECONDS
+):
+    """
+    Find pairs of distinct fixes (latitude, longitude and, if given, time)
+    within `distance_m` metres and `seconds` of each other. Rows sharing a
+    fix, such as the depth levels of one cast, count as one fix. Fixes are
+    binned into a grid of cells at least as large as the tolerances, so only
+    fixes in neighbouring cells are compared and the work grows with the
+    number of fixes rather than its square.
+
+    Returns a DataFrame of pairs with the first row of each fix, the distance
+    in metres and the time apart in seconds, and an array giving each row's
+    fix number (-1 for rows without a valid fix).
+    """
+    if distance_m <= 0 or seconds <= 0:
+        raise ValueError("The near-duplicate distance and time window must be positive.")
+    columns = {"lat": lat, "lon": lon}
+    if times is not None:
+        columns["time"] = times
+    fixes = pd.DataFrame(columns)
+    valid = fixes.notna().all(axis=1).to_numpy()
+    fix_of_row = np.full(len(fixes), -1, dtype=np.int64)
+    fix_of_row[valid] = fixes[valid].groupby(list(columns), sort=False).ngroup().to_numpy()
+    first_rows = np.flatnonzero(valid)[~pd.Series(fix_of_row[valid]).duplicated().to_numpy()]
+    fixes = fixes.iloc[first_rows]
+
+    # Fixes within the tolerance differ by at most `lat_step` in latitude and,
+    # at the highest latitude in the data, `lon_step` in longitude
+    lat_step = np.degrees(distance_m / EARTH_RADIUS_M)
+    max_lat = fixes["lat"].abs().max() if len(fixes) else 0
+    lon_ratio = np.sin(distance_m / (2 * EARTH_RADIUS_M)) / max(np.cos(np.radians(max_lat)), 1e-12)
+    lon_step = np.degrees(2 * np.arcsin(min(lon_ratio, 1)))
+    # A whole number of longitude cells, each at least `lon_step` wide
+    n_lon = max(int(360 / lon_step), 1)
+    cells = {
+        "y": np.floor((fixes["lat"].to_numpy() + 90) / lat_step).astype(np.int64),
+        "x": np.floor((fixes["lon"].to_numpy() + 180) * n_lon / 360).astype(np.int64) % n_lon,
+    }
+    if times is not None:
+        stamps = fixes["time"].to_numpy("datetime64[ns]").astype(np.int64) / 1e9
+        cells["t"] = np.floor(stamps / seconds).astype(np.int64)
+
+    pairs = _grid_pairs(cells, wrap={"x": n_lon})
+    a, b = fixes.iloc[pairs[:, 0]], fixes.iloc[pairs[:, 1]]
+    result = pd.DataFrame(
+        {
+            "row": first_rows[pairs[:, 0]],
+            "other_row": first_rows[pairs[:, 1]],
+            "distance_m": great_circle_distance(
+                a["lat"].to_numpy(), a["lon"].to_numpy(), b["lat"].to_numpy(), b["lon"].to_numpy()
+            ),
+        }
+    )
+    close = result["distance_m"].to_numpy() <= distance_m
+    if times is not None:
+        apart = np.abs(a["time"].to_numpy() - b["time"].to_numpy()) / np.timedelta64(1, "s")
+        result["seconds_apart"] = apart
+        close &= apart <= seconds
+    return result[close].sort_values(["row", "other_row"], ignore_index=True), fix_of_row
+
+
+@instrumented
+def find_duplicates(df, distance_m=DEFAULT_NEAR_DISTANCE_M, seconds=DEFAULT_NEAR_SECONDS):
+    """
+    Run the duplicate checks on `df`: rows repeated exactly, and, when the
+    coordinate columns are detected, near-duplicate fixes within `distance_m`
+    metres and, when a date column is detected too, `seconds` of each other.
+
+    Returns a dictionary with the "exact" and "near" DataFrames (None without
+    coordinates), the "columns" used (latitude, longitude, date, time) and
+    "bitmaps" locating the rows of each finding for the Issue Explorer.
+    """
+    exact = exact_duplicates(df)
+    bitmaps = {}
+    if len(exact):
+        bitmaps[("exact_duplicates", "all columns")] = RowBitmap.from_rows(exact["row"], len(df))
+
+    lat_col, lon_col = find_coordinate_columns(df.columns)
+    date_col, time_col = find_time_columns(df.columns)
+    near = None
+    if lat_col and lon_col:
+        lat, lon = coordinate_values(df, lat_col, lon_col)
+        times = record_times(df, date_col, time_col) if date_col else None
+        near, fix_of_row = near_duplicates(lat, lon, times, distance_m, seconds)
+        if len(near):
+            # Every row of the fixes involved, e.g. all levels of both casts
+            involved = fix_of_row[np.concatenate([near["row"], near["other_row"]])]
+            mask = np.isin(fix_of_row, involved)
+            bitmaps[("near_duplicates", f"{lat_col},{lon_col}")] = RowBitmap.from_mask(mask)
+    return {
+        "exact": exact,
+        "near": near,
+        "columns": (lat_col, lon_col, date_col, time_col if date_col else None),
+        "bitmaps": bitmaps,
+    }
+
+
+def duplicate_records(result, distance_m=DEFAULT_NEAR_DISTANCE_M, seconds=DEFAULT_NEAR_SECONDS):
+    """
+    Turn find_duplicates results into finding records shaped like those of
+    results_to_records.
+    """
+    lat_col, lon_col, date_col, _ = result["columns"]
+    exact, near = result["exact"], result["near"]
+    records = [
+        {
+            "check": "exact_duplicates",
+            "column": "all columns",
+            "status": "issue" if len(exact) else "ok",
+            "detail": f"{len(exact)} rows repeat an earlier row exactly."
+            if len(exact)
+            else "No rows are repeated.",
+        }
+    ]
+    if near is not None:
+        within = f"{distance_m:g} m" + (f" and {seconds:g} s" if date_col else "")
+        records.append(
+            {
+                "check": "near_duplicates",
+                "column": f"{lat_col},{lon_col}",
+                "status": "issue" if len(near) else "ok",
+                "detail": f"{len(near)} pairs of positions are within {within} of each other."
+                if len(near)
+                else f"No distinct positions are within {within} of each other.",
+            }
+        )
+    return records
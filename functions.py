@@ -1,52 +1,245 @@
-import pandas as pd
+import codecs
+import contextvars
+import csv
+import importlib.util
+import io
+import multiprocessing
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 
-
+import numpy as np
 import pandas as pd
 
+from instrumentation import instrumented
+from violations import RowBitmap
+
+
+FORBIDDEN_CHARS = r"[ !@#\$%\^&\*\(\)\-\+=\{\}\[\]\|\\:;\"'<>,\?\/]"
+COLUMN_NAME_PATTERN = r"^[A-Za-z0-9_]+$"
+
+# Names of latitude and longitude columns, and the valid ranges of their values
+LATITUDE_COLUMN_PATTERN = r"^lat|latitude"
+LONGITUDE_COLUMN_PATTERN = r"^lon|longitude"
+MAX_LATITUDE = 90
+MAX_LONGITUDE = 180
+
 
-def load_data(file, sep, enc):
+# Strings pandas reads as missing by default; the pyarrow engine uses the
+# same list so both engines agree on nulls
+PANDAS_NA_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a",
+    "nan", "null",
+]
+
+# calamine reads Excel files far faster than openpyxl/xlrd; used when installed
+EXCEL_ENGINE = "calamine" if importlib.util.find_spec("python_calamine") else None
+
+
+def is_csv(name):
+    """
+    Whether a file name has the .csv extension, in any case.
+    """
+    return name.lower().endswith(".csv")
+
+
+@instrumented
+def load_data(
+    file, sep, enc, nrows=None, engine="pandas", sheet_name=0, sample_size=None, seed=0
+):
     """
     Load data from a CSV or Excel file into a pandas DataFrame with error handling.
+    Pass `nrows` to read only the first rows of the file. With engine="pyarrow",
+    full CSV reads use pyarrow's multithreaded parser and Arrow-backed columns.
+    `sheet_name` selects the Excel sheet to read. With `sample_size`, a uniform
+    random sample of that many rows is drawn while streaming through the file
+    (see sampling.reservoir_sample); the engine is ignored in that case.
     """
     try:
         # Try to read CSV or Excel file with specified separator and encoding
-        if file.name.endswith(".csv"):
-            df = pd.read_csv(file, sep=sep, encoding=enc)
+        if sample_size is not None:
+            from sampling import reservoir_sample
+            from streaming import iter_chunks
+
+            if is_csv(file.name):
+                chunks = iter_chunks(file, sep, enc)
+            else:
+                chunks = [
+                    pd.read_excel(file, sheet_name=sheet_name, engine=EXCEL_ENGINE)
+                ]
+            df = reservoir_sample(chunks, sample_size, seed)
+        elif engine == "pyarrow" and nrows is None and is_csv(file.name):
+            from arrow_engine import read_csv_arrow
+
+            df = read_csv_arrow(file, sep, enc)
+        elif is_csv(file.name):
+            df = pd.read_csv(file, sep=sep, encoding=enc, nrows=nrows)
         else:
-            df = pd.read_excel(file)
+            df = pd.read_excel(
+                file, sheet_name=sheet_name, nrows=nrows, engine=EXCEL_ENGINE
+            )
         return df, None
+    except Exception as e:
+        return None, load_error_message(e, sep)
+
+
+# Candidates tried when the separator or encoding is set to AUTO
+AUTO = "auto"
+SEPARATOR_CANDIDATES = [",", ";", "\t", "|"]
+ENCODING_CANDIDATES = ["utf-8", "cp1252", "ISO-8859-1"]
+SNIFF_BYTES = 64 * 1024
+
+
+def sniff_encoding(sample):
+    """
+    Return the first candidate encoding that decodes the byte sample.
+    A multi-byte character cut off at the end of the sample is tolerated.
+    """
+    for enc in ENCODING_CANDIDATES:
+        try:
+            codecs.getincrementaldecoder(enc)().decode(sample, final=False)
+            return enc
+        except UnicodeDecodeError:
+            continue
+    return ENCODING_CANDIDATES[-1]
 
+
+def sniff_separator(text):
+    """
+    Score each candidate separator on the complete lines of a text sample and
+    return the best one. A good separator splits every line into the same
+    number of fields, and more than one; ties go to the larger field count.
+    """
+    lines = text.splitlines()
+    if len(lines) > 1:
+        # The last line of a sample is usually cut off
+        lines = lines[:-1]
+    best, best_score = SEPARATOR_CANDIDATES[0], (0.0, 0)
+    for sep in SEPARATOR_CANDIDATES:
+        counts = [len(row) for row in csv.reader(lines, delimiter=sep) if row]
+        if not counts:
+            continue
+        width = max(set(counts), key=counts.count)
+        if width < 2:
+            continue
+        score = (counts.count(width) / len(counts), width)
+        if score > best_score:
+            best, best_score = sep, score
+    return best
+
+
+def resolve_format(file, sep, enc):
+    """
+    Replace AUTO separator and encoding settings with values sniffed from the
+    first SNIFF_BYTES of a CSV file, without moving its read position.
+    """
+    if (sep != AUTO and enc != AUTO) or not is_csv(file.name):
+        return ("," if sep == AUTO else sep), ("utf-8" if enc == AUTO else enc)
+    position = file.tell()
+    sample = file.read(SNIFF_BYTES)
+    file.seek(position)
+    if enc == AUTO:
+        enc = sniff_encoding(sample)
+    if sep == AUTO:
+        sep = sniff_separator(sample.decode(enc, errors="ignore"))
+    return sep, enc
+
+
+def list_excel_sheets(file):
+    """
+    Return the sheet names of an Excel file without parsing the sheets.
+    """
+    position = file.tell()
+    with pd.ExcelFile(file, engine=EXCEL_ENGINE) as workbook:
+        sheet_names = workbook.sheet_names
+    file.seek(position)
+    return sheet_names
+
+
+# Workbook opened once per process by load_excel_sheets workers
+_worker_workbook = None
+
+
+def _open_workbook(data):
+    global _worker_workbook
+    _worker_workbook = pd.ExcelFile(io.BytesIO(data), engine=EXCEL_ENGINE)
+
+
+def _parse_sheet(sheet_name, workbook=None):
+    try:
+        return (workbook or _worker_workbook).parse(sheet_name), None
+    except Exception as e:
+        return None, load_error_message(e, None)
+
+
+@instrumented
+def load_excel_sheets(file, sheet_names, max_workers=None):
+    """
+    Load several sheets of an Excel file, in parallel worker processes when
+    there is more than one sheet and `max_workers` is not 1. Each worker opens
+    the workbook once and parses its share of the sheets.
+    Returns a dictionary of {sheet name: (DataFrame, error message)}.
+    """
+    position = file.tell()
+    file.seek(0)
+    data = file.read()
+    file.seek(position)
+
+    workers = min(max_workers or os.cpu_count() or 1, len(sheet_names))
+    if workers <= 1:
+        try:
+            with pd.ExcelFile(io.BytesIO(data), engine=EXCEL_ENGINE) as workbook:
+                return {name: _parse_sheet(name, workbook) for name in sheet_names}
+        except Exception as e:
+            return {name: (None, load_error_message(e, None)) for name in sheet_names}
+
+    # Spawned workers avoid forking a multi-threaded server process
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_open_workbook,
+        initargs=(data,),
+    ) as executor:
+        return dict(zip(sheet_names, executor.map(_parse_sheet, sheet_names)))
+
+
+def load_error_message(error, sep):
+    """
+    Turn an exception raised while reading a file into a user-facing message.
+    """
     # Handle encoding errors
-    except UnicodeDecodeError as e:
-        error_msg = f"Encoding error: {e}. Try using a different encoding."
-        return None, error_msg
+    if isinstance(error, UnicodeDecodeError):
+        return f"Encoding error: {error}. Try using a different encoding."
 
     # Handle separator or parsing errors in CSV files
-    except pd.errors.ParserError as e:
-        error_msg = f"Parsing error: {e}. Check if the selected separator [{sep}] matches the file structure."
-        return None, error_msg
+    if isinstance(error, pd.errors.ParserError):
+        return f"Parsing error: {error}. Check if the selected separator [{sep}] matches the file structure."
 
     # General exception catch for unexpected errors
-    except Exception as e:
-        error_msg = f"An unexpected error occurred: {e}"
-        return None, error_msg
+    return f"An unexpected error occurred: {error}"
 
 
+@instrumented
 def check_column_names(df):
     """
     Check for spaces, special characters, and adherence to naming conventions in column names.
     """
+    if is_arrow_backed(df):
+        from arrow_engine import check_column_names_arrow
+
+        return check_column_names_arrow(df.columns)
+
     issues = {}
-    forbidden_chars = r"[ !@#\$%\^&\*\(\)\-\+=\{\}\[\]\|\\:;\"'<>,\?\/]"
     for col in df.columns:
-        if re.search(forbidden_chars, col):
+        if re.search(FORBIDDEN_CHARS, col):
             issues[col] = "Contains spaces, hyphens, or special characters."
-        elif not re.match("^[A-Za-z0-9_]+$", col):
+        elif not re.match(COLUMN_NAME_PATTERN, col):
             issues[col] = "Contains characters outside of alphanumeric and underscores."
     return issues
 
 
+@instrumented
 def check_missing_values(df):
     """
     Identify columns with missing values and their counts.
@@ -55,20 +248,193 @@ def check_missing_values(df):
     return missing_values[missing_values > 0]
 
 
+@instrumented
 def check_data_types(df):
     """
     Verify that each column has a consistent data type.
     """
-    return df.dtypes
+    return source_dtypes(df)
+
+
+def source_dtypes(df):
+    """
+    Return the dtypes the columns of `df` were loaded with. Frames compacted by
+    compaction.compact_frame record their original dtypes in
+    `attrs["source_dtypes"]`, so checks report the types found in the file.
+    """
+    recorded = df.attrs.get("source_dtypes")
+    if not recorded:
+        return df.dtypes
+    return pd.Series(
+        [recorded.get(col, dtype) for col, dtype in df.dtypes.items()],
+        index=df.columns,
+        dtype=object,
+    )
+
+
+DATE_PATTERN = r"^\d{4}-\d{2}-\d{2}$"
+TIME_PATTERN = r"^\d{2}:\d{2}(:\d{2})?$"
+
+# Pattern scans start on a small block and double it up to SCAN_MAX_BLOCK rows,
+# so columns that clearly do not match are rejected after a few values.
+SCAN_FIRST_BLOCK = 128
+SCAN_MAX_BLOCK = 262_144
+
+
+def is_text_dtype(dtype):
+    """
+    Tell whether a column dtype holds text: Python objects, Arrow strings or
+    categories of either.
+    """
+    if isinstance(dtype, pd.CategoricalDtype):
+        return is_text_dtype(dtype.categories.dtype)
+    if isinstance(dtype, pd.ArrowDtype):
+        return pd.api.types.is_string_dtype(dtype)
+    return dtype == object
+
+
+def is_arrow_backed(df):
+    """
+    Tell whether a DataFrame was loaded with the pyarrow engine.
+    """
+    return any(isinstance(dtype, pd.ArrowDtype) for dtype in df.dtypes)
+
+
+def column_matches(values, pattern):
+    """
+    Return True when every string value in `values` matches `pattern`.
+    Null and non-string values are ignored, as with `str.match(...).all()`,
+    and the scan stops at the first block containing a mismatch.
+    """
+    if isinstance(values.dtype, pd.ArrowDtype):
+        from arrow_engine import arrow_column_matches
+
+        return arrow_column_matches(values, pattern)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Match each distinct value once, in order of first occurrence so a
+        # mismatch near the top of the column still stops the scan early
+        codes = values.cat.codes.to_numpy()
+        present = values.cat.categories[pd.unique(codes[codes >= 0])]
+        return column_matches(pd.Series(present, dtype=object), pattern)
+
+    start, block = 0, SCAN_FIRST_BLOCK
+    while start < len(values):
+        try:
+            matched = values.iloc[start : start + block].str.match(pattern).all()
+        except AttributeError:
+            # Block holds no string values at all
+            matched = True
+        if not matched:
+            return False
+        start += block
+        block = min(block * 2, SCAN_MAX_BLOCK)
+    return True
+
+
+def pattern_mismatches(values, pattern):
+    """
+    Return a boolean mask of the string values in `values` in which `pattern`
+    is not found. Like the Arrow version, the pattern may match anywhere in
+    a value unless it is anchored with ^ and $, as the built-in patterns are.
+    Null and non-string values are not flagged, as in column_matches.
+    """
+    if isinstance(values.dtype, pd.ArrowDtype):
+        from arrow_engine import arrow_pattern_mismatches
+
+        return arrow_pattern_mismatches(values, pattern)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Match the categories once and look the rows up by code; -1 (null) maps to False
+        mismatched = pattern_mismatches(
+            pd.Series(values.cat.categories, dtype=object), pattern
+        )
+        return np.append(mismatched, False)[values.cat.codes.to_numpy()]
+    if not pd.api.types.is_string_dtype(values.dtype):
+        return np.zeros(len(values), dtype=bool)
+    # As fast as str.contains, which warns about patterns with groups
+    search = re.compile(pattern).search
+    return np.fromiter(
+        (isinstance(value, str) and search(value) is None for value in values.to_numpy()),
+        dtype=bool,
+        count=len(values),
+    )
+
+
+@instrumented
+def scan_columns(df):
+    """
+    Visit each column once and collect the statistics the column checks need:
+    dtype, null count, whether it holds text and whether its values match the
+    ISO 8601 date and time patterns.
+    """
+    scan = {}
+    dtypes = source_dtypes(df)
+    for col in df.columns:
+        values = df[col]
+        is_text = is_text_dtype(values.dtype)
+        scan[col] = {
+            "dtype": dtypes[col],
+            "null_count": int(values.isna().sum()),
+            "is_text": is_text,
+            "date_match": is_text and column_matches(values, DATE_PATTERN),
+            "time_match": is_text and column_matches(values, TIME_PATTERN),
+        }
+    return scan
+
+
+@instrumented
+def run_checks(df):
+    """
+    Run the full check suite on a DataFrame with a single fused scan over its
+    columns. Returns a dictionary keyed by check name holding the same results
+    as the individual check_* functions.
+    """
+    scan = scan_columns(df)
+    coordinates, violations = coordinate_check(df)
+
+    def is_text(col):
+        return scan[col]["is_text"]
+
+    missing_values = pd.Series(
+        {col: stats["null_count"] for col, stats in scan.items()}, dtype="int64"
+    )
+    return {
+        "n_rows": len(df),
+        "column_names": check_column_names(df),
+        "missing_values": missing_values[missing_values > 0],
+        "data_types": pd.Series(
+            {col: stats["dtype"] for col, stats in scan.items()}, dtype=object
+        ),
+        "date_format": date_format_report(
+            df.columns, is_text, lambda col: scan[col]["date_match"]
+        ),
+        "time_format": time_format_report(
+            df.columns, is_text, lambda col: scan[col]["time_match"]
+        ),
+        "coordinates": coordinates,
+        "coordinate_violations": violations,
+    }
 
 
+@instrumented
 def check_date_format(df):
     """
     Validate that date columns follow the ISO 8601 format (YYYY-MM-DD).
     If no 'date' column is found, search for columns with values that resemble date format.
     """
-    date_pattern = r"^\d{4}-\d{2}-\d{2}$"
-    date_columns = [col for col in df.columns if col.lower().startswith("date")]
+    return date_format_report(
+        df.columns,
+        is_text=lambda col: is_text_dtype(df[col].dtype),
+        all_match=lambda col: column_matches(df[col], DATE_PATTERN),
+    )
+
+
+def date_format_report(columns, is_text, all_match):
+    """
+    Build the check_date_format result from per-column predicates.
+    `is_text(col)` tells whether a column holds strings and `all_match(col)`
+    whether all its non-null values match DATE_PATTERN.
+    """
+    date_columns = [col for col in columns if col.lower().startswith("date")]
     date_issues = {}
     valid_date_columns = []
 
@@ -76,17 +442,15 @@ def check_date_format(df):
     if not date_columns:
         # Look for columns where all values match the date pattern
         potential_date_columns = [
-            col
-            for col in df.columns
-            if df[col].dtype == object and df[col].str.match(date_pattern).all()
+            col for col in columns if is_text(col) and all_match(col)
         ]
         date_columns.extend(potential_date_columns)
 
     # Perform checks on identified date columns
     if date_columns:
         for col in date_columns:
-            if df[col].dtype == object:
-                if not df[col].str.match(date_pattern).all():
+            if is_text(col):
+                if not all_match(col):
                     date_issues[col] = (
                         f"Column '{col}' does not follow ISO 8601 format (YYYY-MM-DD)😟. Please double check it and update it if necessary."
                     )
@@ -104,13 +468,26 @@ def check_date_format(df):
     return date_issues, valid_date_columns
 
 
+@instrumented
 def check_time_format(df):
     """
     Validate that time columns follow the ISO 8601 format (HH:MM[:SS]).
     If no 'time' column is found, search for columns with values that resemble time.
     """
-    time_pattern = r"^\d{2}:\d{2}(:\d{2})?$"
-    time_columns = [col for col in df.columns if col.lower().startswith("time")]
+    return time_format_report(
+        df.columns,
+        is_text=lambda col: is_text_dtype(df[col].dtype),
+        all_match=lambda col: column_matches(df[col], TIME_PATTERN),
+    )
+
+
+def time_format_report(columns, is_text, all_match):
+    """
+    Build the check_time_format result from per-column predicates.
+    `is_text(col)` tells whether a column holds strings and `all_match(col)`
+    whether all its non-null values match TIME_PATTERN.
+    """
+    time_columns = [col for col in columns if col.lower().startswith("time")]
     time_issues = {}
     valid_time_columns = []
 
@@ -118,17 +495,15 @@ def check_time_format(df):
     if not time_columns:
         # Look for columns where all values match the time pattern
         potential_time_columns = [
-            col
-            for col in df.columns
-            if df[col].dtype == object and df[col].str.match(time_pattern).all()
+            col for col in columns if is_text(col) and all_match(col)
         ]
         time_columns.extend(potential_time_columns)
 
     # Perform checks on identified time columns
     if time_columns:
         for col in time_columns:
-            if df[col].dtype == object:
-                if not df[col].str.match(time_pattern).all():
+            if is_text(col):
+                if not all_match(col):
                     time_issues[col] = (
                         f"Column '{col}' does not follow ISO 8601 format (HH:MM[:SS])😟. Please double check it and update it if necessary."
                     )
@@ -146,44 +521,199 @@ def check_time_format(df):
     return time_issues, valid_time_columns
 
 
+@instrumented
 def check_coordinates(df):
     """
-    Validate that latitude and longitude columns are within valid decimal degree ranges,
-    ensure they are in decimal degrees format, and make latitude values negative where needed.
+    Validate that latitude and longitude columns are within valid decimal degree ranges
+    and ensure they are in decimal degrees format. The DataFrame is not modified.
+    """
+    return coordinate_check(df)[0]
+
+
+@instrumented
+def coordinate_check(df):
+    """
+    Run check_coordinates and also return the row-level violations, or None
+    when the coordinate columns could not be detected.
+    """
+    lat_col, lon_col = find_coordinate_columns(df.columns)
+    if not (lat_col and lon_col):
+        return coordinate_report(lat_col, lon_col, False, False, False, False), None
+
+    violations = coordinate_violations(df, lat_col, lon_col)
+
+    # Missing or unparseable values fail the range check as well
+    lat_in_degrees = not any(
+        len(violations[key]) for key in ("lat_out_of_range", "lat_missing", "lat_non_numeric")
+    )
+    lon_in_degrees = not any(
+        len(violations[key]) for key in ("lon_out_of_range", "lon_missing", "lon_non_numeric")
+    )
+
+    # Check if the latitude and longitude columns are numeric
+    lat_is_numeric = pd.api.types.is_numeric_dtype(df[lat_col])
+    lon_is_numeric = pd.api.types.is_numeric_dtype(df[lon_col])
+
+    report = coordinate_report(
+        lat_col, lon_col, lat_in_degrees, lon_in_degrees, lat_is_numeric, lon_is_numeric
+    )
+    return report, violations
+
+
+def coerce_numeric(values):
+    """
+    Convert a column to numbers without copying columns that already are numeric.
+    Returns the numeric values and a mask of non-null entries that failed to parse.
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        return values, np.zeros(len(values), dtype=bool)
+    numeric = pd.to_numeric(values, errors="coerce")
+    return numeric, (numeric.isna() & values.notna()).to_numpy(dtype=bool)
+
+
+# Descriptions of the row-level problems returned by coordinate_violations
+COORDINATE_VIOLATION_LABELS = {
+    "lat_out_of_range": f"have latitudes outside {-MAX_LATITUDE} to {MAX_LATITUDE}",
+    "lon_out_of_range": f"have longitudes outside {-MAX_LONGITUDE} to {MAX_LONGITUDE}",
+    "lat_missing": "have no latitude",
+    "lon_missing": "have no longitude",
+    "lat_non_numeric": "have latitudes that are not numbers",
+    "lon_non_numeric": "have longitudes that are not numbers",
+    "lat_sign_flipped": "have positive (northern hemisphere) latitudes; check whether the sign is missing",
+}
+
+
+def coordinate_violations(df, lat_col, lon_col):
+    """
+    Locate coordinate problems row by row. Returns a dictionary of RowBitmaps
+    of the out-of-range, missing and non-numeric latitudes and longitudes,
+    plus rows with positive latitudes that may have lost their
+    southern-hemisphere sign.
+    """
+    lat, lat_non_numeric = coerce_numeric(df[lat_col])
+    lon, lon_non_numeric = coerce_numeric(df[lon_col])
+    masks = {
+        "lat_out_of_range": (lat.abs() > MAX_LATITUDE).to_numpy(dtype=bool, na_value=False),
+        "lon_out_of_range": (lon.abs() > MAX_LONGITUDE).to_numpy(dtype=bool, na_value=False),
+        "lat_missing": df[lat_col].isna().to_numpy(),
+        "lon_missing": df[lon_col].isna().to_numpy(),
+        "lat_non_numeric": lat_non_numeric,
+        "lon_non_numeric": lon_non_numeric,
+        "lat_sign_flipped": (lat > 0).to_numpy(dtype=bool, na_value=False),
+    }
+    # Bitmaps take a bit per row, where positions of e.g. every northern
+    # hemisphere row would take 64
+    return {kind: RowBitmap.from_mask(mask) for kind, mask in masks.items()}
+
+
+def find_coordinate_columns(columns):
+    """
+    Locate columns with "lat" or "latitude" and "lon" or "longitude" in their names.
     """
-    # Locate columns with "lat" or "latitude" and "lon" or "longitude" in their names
     lat_col = next(
-        (col for col in df.columns if re.search(r"^lat|latitude", col, re.IGNORECASE)),
+        (col for col in columns if re.search(LATITUDE_COLUMN_PATTERN, col, re.IGNORECASE)),
         None,
     )
     lon_col = next(
-        (col for col in df.columns if re.search(r"^lon|longitude", col, re.IGNORECASE)),
+        (col for col in columns if re.search(LONGITUDE_COLUMN_PATTERN, col, re.IGNORECASE)),
         None,
     )
-    coord_issues = {}
-    success_message = None
+    return lat_col, lon_col
 
-    if lat_col and lon_col:
-        # Ensure latitude values are negative if needed
-        df[lat_col] = df[lat_col].apply(lambda x: -abs(x) if x > 0 else x)
 
-        # Check if latitude and longitude values are within decimal degrees ranges
-        lat_in_degrees = df[lat_col].between(-90, 90).all()
-        lon_in_degrees = df[lon_col].between(-180, 180).all()
+def find_time_columns(columns):
+    """
+    Locate the first columns whose names start with "date" and "time".
+    """
+    date_col = next((col for col in columns if col.lower().startswith("date")), None)
+    time_col = next((col for col in columns if col.lower().startswith("time")), None)
+    return date_col, time_col
+
+
+def record_times(df, date_col, time_col=None):
+    """
+    Combine a date column and an optional time-of-day column into one
+    datetime64[ns] array, NaT where either is missing or not in ISO 8601
+    format. Times must match TIME_PATTERN, and are only added to dates
+    without a time of their own. Dates with UTC offsets are converted to
+    UTC; dates without one are taken as they are. Each distinct date and
+    time is parsed once.
+    """
+    codes, values = pd.factorize(df[date_col])
+    values = np.asarray(values, dtype=object)
+    # Parsing as UTC keeps mixed offsets from turning the result into objects
+    dates = pd.to_datetime(
+        pd.Index(values), errors="coerce", format="ISO8601", utc=True
+    ).tz_localize(None)
+    stamps = np.append(dates.to_numpy("datetime64[ns]"), np.datetime64("NaT"))[codes]
+    if time_col is not None:
+        # Date strings carry a time when they are more than YYYY-MM-DD; parsed dates when it is not midnight
+        is_text = np.array([isinstance(value, str) for value in values], dtype=bool)
+        date_only = np.where(
+            is_text,
+            pd.Series(values, dtype=object).astype(str).str.fullmatch(DATE_PATTERN).to_numpy(bool),
+            dates == dates.normalize(),
+        )
+        date_only = np.append(date_only, False)[codes]
+        time_codes, times = pd.factorize(df[time_col])
+        times = pd.Series(np.asarray(times, dtype=object)).astype(str)
+        valid = times.str.fullmatch(TIME_PATTERN)
+        # Seconds are optional in HH:MM[:SS]
+        times = times.where(~times.str.fullmatch(r"\d{2}:\d{2}"), times + ":00")
+        offsets = pd.to_timedelta(times.where(valid), errors="coerce").to_numpy("timedelta64[ns]")
+        offsets = np.append(offsets, np.timedelta64("NaT"))[time_codes]
+        stamps = np.where(date_only, stamps + offsets, stamps)
+    return stamps
+
+
+def coordinate_values(df, lat_col, lon_col):
+    """
+    Latitudes and longitudes as float arrays, NaN where missing, not numbers
+    or outside the valid ranges.
+    """
+    lat = coerce_numeric(df[lat_col])[0].to_numpy(dtype="float64", na_value=np.nan)
+    lon = coerce_numeric(df[lon_col])[0].to_numpy(dtype="float64", na_value=np.nan)
+    # The arrays may be views of the frame's columns, so new ones are built
+    valid = (np.abs(lat) <= MAX_LATITUDE) & (np.abs(lon) <= MAX_LONGITUDE)
+    return np.where(valid, lat, np.nan), np.where(valid, lon, np.nan)
 
-        # Check if the latitude and longitude columns are numeric
-        lat_is_numeric = pd.api.types.is_numeric_dtype(df[lat_col])
-        lon_is_numeric = pd.api.types.is_numeric_dtype(df[lon_col])
 
+EARTH_RADIUS_M = 6_371_008.8
+
+
+def great_circle_distance(lat1, lon1, lat2, lon2):
+    """
+    Haversine distance in metres between points in decimal degrees, element-wise.
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(a) for a in (lat1, lon1, lat2, lon2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def coordinate_report(
+    lat_col, lon_col, lat_in_degrees, lon_in_degrees, lat_is_numeric, lon_is_numeric
+):
+    """
+    Build the check_coordinates result from the range and type verdicts.
+    """
+    coord_issues = {}
+    success_message = None
+
+    if lat_col and lon_col:
         # Collect issues or provide success message
         if lat_in_degrees and lon_in_degrees and lat_is_numeric and lon_is_numeric:
             success_message = f"The '{lat_col}' and '{lon_col}' columns appear to be in decimal degrees and within valid ranges😀."
         else:
             if not lat_in_degrees:
-                coord_issues[lat_col] = "Contains values outside the range -90 to 90😟."
+                coord_issues[lat_col] = (
+                    f"Contains values outside the range {-MAX_LATITUDE} to {MAX_LATITUDE}😟."
+                )
             if not lon_in_degrees:
                 coord_issues[lon_col] = (
-                    "Contains values outside the range -180 to 180😟."
+                    f"Contains values outside the range {-MAX_LONGITUDE} to {MAX_LONGITUDE}😟."
                 )
             if not lat_is_numeric:
                 coord_issues[lat_col] = (
@@ -199,3 +729,101 @@ def check_coordinates(df):
         )
 
     return coord_issues, success_message, lat_col, lon_col
+
+
+# Independent checks that iter_check_results runs side by side
+CHECK_TASKS = {
+    "column_names": check_column_names,
+    "missing_values": check_missing_values,
+    "data_types": check_data_types,
+    "date_format": check_date_format,
+    "time_format": check_time_format,
+    "coordinates": coordinate_check,
+}
+
+
+def iter_check_results(df, tasks=None, max_workers=None):
+    """
+    Run independent checks on a thread pool and yield (name, result, error)
+    tuples in the order the checks finish. `tasks` maps names to callables
+    taking the DataFrame and defaults to CHECK_TASKS. Profiling context is
+    carried into the worker threads.
+    """
+    tasks = CHECK_TASKS if tasks is None else tasks
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(contextvars.copy_context().run, task, df): name
+            for name, task in tasks.items()
+        }
+        for future in as_completed(futures):
+            error = future.exception()
+            yield futures[future], None if error else future.result(), error
+
+
+def collect_check_results(df, task_results):
+    """
+    Assemble the results of the CHECK_TASKS run on `df` into the dictionary
+    run_checks returns.
+    """
+    coordinates, violations = task_results["coordinates"]
+    return {
+        "n_rows": len(df),
+        **{
+            name: result
+            for name, result in task_results.items()
+            if name != "coordinates"
+        },
+        "coordinates": coordinates,
+        "coordinate_violations": violations,
+    }
+
+
+def results_to_records(results):
+    """
+    Flatten a run_checks results dictionary into one record per finding,
+    each with the check name, the column concerned, a status and a detail.
+    """
+    records = []
+
+    def add(check, column, status, detail):
+        records.append(
+            {"check": check, "column": str(column), "status": status, "detail": detail}
+        )
+
+    for col, issue in results["column_names"].items():
+        add("column_names", col, "issue", issue)
+    for col, count in results["missing_values"].items():
+        add("missing_values", col, "issue", f"{int(count)} missing values")
+    for col, dtype in results["data_types"].items():
+        add("data_types", col, "info", str(dtype))
+    for check, label in (("date_format", "YYYY-MM-DD"), ("time_format", "HH:MM[:SS]")):
+        issues, valid_columns = results[check]
+        for col, issue in issues.items():
+            add(check, col, "issue", issue)
+        for col in valid_columns:
+            add(check, col, "ok", f"Column is ISO 8601 ({label}).")
+
+    coord_issues, success_message, lat_col, lon_col = results["coordinates"]
+    for col, issue in coord_issues.items():
+        add("coordinates", col, "issue", issue)
+    if success_message:
+        add("coordinates", f"{lat_col},{lon_col}", "ok", success_message)
+    for kind, rows in (results.get("coordinate_violations") or {}).items():
+        if len(rows):
+            add(
+                "coordinate_violations",
+                lat_col if kind.startswith("lat") else lon_col,
+                "info" if kind == "lat_sign_flipped" else "issue",
+                f"{len(rows)} rows {COORDINATE_VIOLATION_LABELS[kind]}.",
+            )
+    # Findings of custom rule sets (see rules.evaluate_plan), missing value
+    # markers (see missing.marker_records), duplicates and position
+    # plausibility are already records
+    for key in (
+        "rule_findings",
+        "marker_findings",
+        "duplicate_findings",
+        "plausibility_findings",
+    ):
+        records.extend(results.get(key, []))
+    return records
@@ -0,0 +1,135 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from pathlib import Path
+
+from cache import HASH_BLOCK_SIZE
+from functions import load_error_message
+from instrumentation import instrumented
+from streaming import DEFAULT_CHUNKSIZE, StreamingChecks, iter_chunks
+
+DEFAULT_STATE_DIR = ".check_state"
+
+# Stored states of another version are ignored and rebuilt from scratch
+STATE_VERSION = 3
+
+
+def state_path(state_dir, name):
+    """
+    Return where the check state of the file called `name` is stored.
+    """
+    key = hashlib.blake2b(str(name).encode("utf-8"), digest_size=8).hexdigest()
+    return Path(state_dir) / f"{key}.state.pkl"
+
+
+def load_state(state_dir, name):
+    """
+    Return the stored check state of the file called `name`, or None.
+    """
+    try:
+        with open(state_path(state_dir, name), "rb") as f:
+            state = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError):
+        return None
+    if state.get("version") != STATE_VERSION or state.get("name") != str(name):
+        return None
+    return state
+
+
+def save_state(state_dir, name, state):
+    """
+    Store the check state of the file called `name`. The file is replaced
+    atomically, so a concurrent reader sees either the old or the new state.
+    """
+    os.makedirs(state_dir, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=state_dir, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        pickle.dump({**state, "version": STATE_VERSION, "name": str(name)}, f)
+    os.replace(temp_path, state_path(state_dir, name))
+
+
+def prefix_digests(file, n_bytes):
+    """
+    Hash a file in one pass, returning the digests of its first `n_bytes`
+    and of its whole content. The read position is left at the start.
+    """
+    file.seek(0)
+    digest = hashlib.blake2b(digest_size=16)
+    prefix = None
+    read = 0
+    for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b""):
+        if prefix is None and read + len(block) >= n_bytes:
+            digest.update(block[: n_bytes - read])
+            prefix = digest.copy().hexdigest()
+            digest.update(block[n_bytes - read :])
+        else:
+            digest.update(block)
+        read += len(block)
+    if prefix is None and read >= n_bytes:
+        prefix = digest.hexdigest()
+    file.seek(0)
+    return prefix, digest.hexdigest()
+
+
+@instrumented
+def run_incremental_checks(
+    file, sep, enc, state_dir=DEFAULT_STATE_DIR, chunksize=DEFAULT_CHUNKSIZE, name=None
+):
+    """
+    Run the streaming checks on a CSV file, reusing the state stored for it
+    by an earlier run. When the file is the previously checked content with
+    rows appended, only the new rows are parsed and their accumulators are
+    merged into the stored ones; otherwise the whole file is checked. The
+    new state is stored under `name` (default: the file name) for next time.
+    Returns the results dictionary, with the number of rows parsed in this
+    run as "rows_parsed", and an error message, mirroring run_streaming_checks.
+    """
+    name = file.name if name is None else name
+    state = load_state(state_dir, name)
+    size = file.seek(0, os.SEEK_END)
+    file.seek(max(size - 1, 0))
+    ends_with_newline = file.read(1) == b"\n"
+    prefix, digest = prefix_digests(file, state["n_bytes"] if state else 0)
+
+    # An append keeps the read settings and every byte up to the old end,
+    # which must have closed its last line
+    is_append = (
+        state is not None
+        and (state["sep"], state["enc"]) == (sep, enc)
+        and state["ends_with_newline"]
+        and prefix == state["digest"]
+    )
+    try:
+        if is_append:
+            checks = state["checks"]
+            file.seek(state["n_bytes"])
+            tail = StreamingChecks()
+            for chunk in iter_chunks(file, sep, enc, chunksize, names=list(checks.columns)):
+                if len(chunk):
+                    tail.update(chunk)
+            checks.merge(tail)
+            rows_parsed = tail.n_rows
+        else:
+            checks = StreamingChecks()
+            for chunk in iter_chunks(file, sep, enc, chunksize):
+                checks.update(chunk)
+            rows_parsed = checks.n_rows
+    except Exception as e:
+        return None, load_error_message(e, sep)
+    if checks.columns is None:
+        return None, "The uploaded file does not contain any data."
+
+    save_state(
+        state_dir,
+        name,
+        {
+            "sep": sep,
+            "enc": enc,
+            "n_bytes": size,
+            "digest": digest,
+            "ends_with_newline": ends_with_newline,
+            "checks": checks,
+        },
+    )
+    return {**checks.results(), "rows_parsed": rows_parsed}, None
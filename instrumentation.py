@@ -0,0 +1,180 @@
+import contextvars
+import functools
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import pandas as pd
+
+# Callbacks receiving every finished stage record, e.g. to forward metrics elsewhere
+METRICS_HOOKS = []
+
+_current_profiler = contextvars.ContextVar("current_profiler", default=None)
+
+# Memory-traced stages open in any thread or profiler, by id, and whether they
+# started tracemalloc; tracing stops only when the last of them closes
+_traced_stages = {}
+_tracing_lock = threading.Lock()
+_started_tracing = False
+
+
+def register_metrics_hook(hook):
+    """
+    Call `hook(record)` for every stage recorded by any profiler in this process.
+    A record is a dictionary with the stage name, seconds, rows, rows_per_second
+    and peak_bytes (None when memory tracing is off).
+    """
+    METRICS_HOOKS.append(hook)
+    return hook
+
+
+def _fold_peak():
+    """
+    Credit the traced peak since the last reset to every open traced stage,
+    then reset it. Must be called holding _tracing_lock.
+    """
+    peak = tracemalloc.get_traced_memory()[1]
+    for record in _traced_stages.values():
+        record["_peak"] = max(record["_peak"], peak)
+    tracemalloc.reset_peak()
+
+
+class Profiler:
+    """
+    Record wall time, throughput and optionally peak memory of nested stages.
+    Memory is traced with tracemalloc, which slows the profiled code down, so it
+    is only enabled when `trace_memory` is set. tracemalloc measures the whole
+    process, so peaks of stages running concurrently, in any thread or
+    profiler, include each other.
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.records = []
+        self._local = threading.local()
+
+    @property
+    def _stack(self):
+        # Stages nest per thread, so concurrent checks each get their own stack
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        """
+        Time the enclosed block. `rows` may be set later through the yielded record.
+        """
+        global _started_tracing
+        record = {"stage": name, "depth": len(self._stack), "rows": rows}
+        if self.trace_memory:
+            with _tracing_lock:
+                if not _traced_stages and not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    _started_tracing = True
+                _fold_peak()
+                record["_start"] = record["_peak"] = tracemalloc.get_traced_memory()[0]
+                _traced_stages[id(record)] = record
+        # Records are kept in start order so nested stages follow their parent
+        self.records.append(record)
+        self._stack.append(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = time.perf_counter() - start
+            self._stack.pop()
+            record["peak_bytes"] = None
+            if self.trace_memory:
+                with _tracing_lock:
+                    _fold_peak()
+                    del _traced_stages[id(record)]
+                    record["peak_bytes"] = record.pop("_peak") - record.pop("_start")
+                    if not _traced_stages and _started_tracing:
+                        tracemalloc.stop()
+                        _started_tracing = False
+            rows = record["rows"]
+            record["rows_per_second"] = (
+                rows / record["seconds"] if rows and record["seconds"] else None
+            )
+            for hook in METRICS_HOOKS:
+                hook(record)
+
+    def to_frame(self):
+        return pd.DataFrame(
+            self.records,
+            columns=["stage", "depth", "seconds", "rows", "rows_per_second", "peak_bytes"],
+        )
+
+    def to_json(self):
+        return json.dumps(self.records, indent=2)
+
+
+def set_profiler(profiler):
+    """
+    Make `profiler` the active profiler for the current context, or disable
+    profiling with None. Suits scripts such as the Streamlit app that cannot
+    wrap their whole body in `profiling`.
+    """
+    _current_profiler.set(profiler)
+
+
+@contextmanager
+def profiling(profiler):
+    """
+    Make `profiler` collect the stages of instrumented functions called in this block.
+    """
+    token = _current_profiler.set(profiler)
+    try:
+        yield profiler
+    finally:
+        _current_profiler.reset(token)
+
+
+@contextmanager
+def stage(name, rows=None):
+    """
+    Record a stage with the active profiler, or do nothing when none is active.
+    """
+    profiler = _current_profiler.get()
+    if profiler is None:
+        yield {}
+        return
+    with profiler.stage(name, rows) as record:
+        yield record
+
+
+def _count_rows(value):
+    """
+    Row count of a DataFrame, a check results dictionary, or a (value, error) pair.
+    """
+    if isinstance(value, tuple) and value:
+        value = value[0]
+    if isinstance(value, pd.DataFrame):
+        return len(value)
+    if isinstance(value, dict):
+        return value.get("n_rows")
+    return None
+
+
+def instrumented(func):
+    """
+    Record each call of `func` as a stage of the active profiler. Rows are
+    taken from a DataFrame argument, or from the DataFrame or results the
+    function returns.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profiler = _current_profiler.get()
+        if profiler is None:
+            return func(*args, **kwargs)
+        with profiler.stage(func.__name__, _count_rows(args[0]) if args else None) as record:
+            result = func(*args, **kwargs)
+            if record["rows"] is None:
+                record["rows"] = _count_rows(result)
+            return result
+
+    return wrapper
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+from instrumentation import instrumented
+
+# Point counts above which markers are clustered and the map is downsampled
+CLUSTER_THRESHOLD = 2_000
+DEFAULT_MAX_MAP_POINTS = 50_000
+
+# Circle markers built in the browser from a flat coordinate array
+CIRCLE_MARKER_CALLBACK = """
+function (row) {
+    var marker = L.circleMarker(new L.LatLng(row[0], row[1]), {radius: 5});
+    marker.bindPopup("Coordinates: " + row[0] + ", " + row[1]);
+    return marker;
+};
+"""
+
+
+@instrumented
+def prepare_map_points(df, lat_col, lon_col):
+    """
+    Return the unique, numeric latitude/longitude pairs of a DataFrame as an (n, 2) array.
+    """
+    points = pd.DataFrame(
+        {
+            "lat": pd.to_numeric(df[lat_col], errors="coerce"),
+            "lon": pd.to_numeric(df[lon_col], errors="coerce"),
+        }
+    )
+    return points.dropna().drop_duplicates().to_numpy(dtype=float)
+
+
+@instrumented
+def downsample_points(points, max_points):
+    """
+    Reduce points to at most `max_points` by keeping the first point in each
+    cell of a regular lat/lon grid. The cell size doubles until the number of
+    occupied cells fits, so the result is deterministic and keeps the spatial
+    coverage of the original track.
+    """
+    if len(points) <= max_points:
+        return points
+    origin = points.min(axis=0)
+    extent = max(float((points.max(axis=0) - origin).max()), 1e-9)
+    # Start fine enough for a one-dimensional track and coarsen from there
+    cell_size = extent / max_points
+    while True:
+        cells = np.floor((points - origin) / cell_size).astype(np.int64)
+        n_cols = int(cells[:, 1].max()) + 1
+        keep = ~pd.Series(cells[:, 0] * n_cols + cells[:, 1]).duplicated().to_numpy()
+        if keep.sum() <= max_points:
+            return points[keep]
+        cell_size *= 2
+
+
+@instrumented
+def build_map(points, style="Clusters"):
+    """
+    Create a leafmap Map showing the points as a single layer: a GeoJSON layer
+    of circle markers for small sets, otherwise client-side clusters or a heatmap.
+    """
+    # The map stack takes seconds to import, so it is only loaded to draw a map
+    import folium
+    import leafmap.foliumap as leafmap
+    from folium.plugins import FastMarkerCluster, HeatMap
+
+    m = leafmap.Map(center=points.mean(axis=0).tolist(), zoom=6)
+    m.add_basemap("Esri.WorldTopoMap")
+    if len(points) <= CLUSTER_THRESHOLD:
+        folium.GeoJson(
+            {
+                "type": "FeatureCollection",
+                "features": [
+                    {
+                        "type": "Feature",
+                        "geometry": {"type": "Point", "coordinates": [lon, lat]},
+                        "properties": {"Coordinates": f"{lat}, {lon}"},
+                    }
+                    for lat, lon in points.tolist()
+                ],
+            },
+            marker=folium.CircleMarker(radius=5),
+            popup=folium.GeoJsonPopup(fields=["Coordinates"]),
+        ).add_to(m)
+    elif style == "Heatmap":
+        HeatMap(points.tolist(), radius=8).add_to(m)
+    else:
+        FastMarkerCluster(points.tolist(), callback=CIRCLE_MARKER_CALLBACK).add_to(m)
+    m.fit_bounds([points.min(axis=0).tolist(), points.max(axis=0).tolist()])
+    return m
@@ -0,0 +1,210 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from functions import PANDAS_NA_VALUES
+from instrumentation import instrumented
+from violations import RowBitmap
+
+# The empty string stands for blank cells: empty or only whitespace
+BLANK = ""
+
+# Placeholders that mean "no value" in the data we receive. Cells that are
+# exactly "NA", "nan", empty or another of PANDAS_NA_VALUES are already read
+# as nulls, so they are counted under "null" and left out here; blank still
+# catches whitespace-only cells.
+DEFAULT_MISSING_MARKERS = [-999, 9999, BLANK]
+
+# Text that may be a numeric marker written out, such as "-999" or "9999.0"
+NUMBER_PATTERN = r"[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?"
+
+
+def marker_label(marker):
+    """
+    Name of a missing value marker in reports: the number or text, or "blank".
+    """
+    if isinstance(marker, str):
+        return "blank" if marker.strip() == BLANK else marker
+    return f"{marker:g}"
+
+
+def parse_markers(text):
+    """
+    Read a comma-separated list of markers such as "-999, 9999, NA, blank".
+    Entries that parse as numbers are numeric markers, "blank" means blank
+    cells and anything else is matched as text.
+    """
+    markers = []
+    for token in text.split(","):
+        token = token.strip()
+        if not token:
+            continue
+        if token.lower() == "blank":
+            markers.append(BLANK)
+            continue
+        try:
+            number = float(token)
+        except ValueError:
+            number = None
+        # "nan" and "inf" parse as floats but are meant as text
+        markers.append(number if number is not None and math.isfinite(number) else token)
+    return markers
+
+
+def null_markers(markers):
+    """
+    Return the text markers that loading turns into nulls whenever they fill
+    a cell exactly, such as "NA", so their cells are counted under "null".
+    """
+    return [
+        marker
+        for marker in markers
+        if isinstance(marker, str) and marker != BLANK and marker in PANDAS_NA_VALUES
+    ]
+
+
+def _numeric_markers(markers):
+    """
+    Map each numeric marker to its label, keyed by its float value.
+    """
+    return {
+        float(marker): marker_label(marker)
+        for marker in markers
+        if isinstance(marker, (int, float, np.number))
+        and not isinstance(marker, bool)
+        and math.isfinite(marker)
+    }
+
+
+def _numeric_column(values, numbers, want_mask):
+    if isinstance(values.dtype, np.dtype):
+        array = values.to_numpy()
+    else:
+        array = values.to_numpy(dtype="float64", na_value=np.nan)
+    null = np.isnan(array) if array.dtype.kind == "f" else np.zeros(len(array), dtype=bool)
+    counts = {"null": int(null.sum())}
+    hits = np.isin(array, list(numbers)) if numbers else np.zeros(len(array), dtype=bool)
+    # Only the few sentinel hits are looked at again to split them by marker
+    found, found_counts = np.unique(array[hits], return_counts=True)
+    for value, count in zip(found, found_counts):
+        label = numbers[float(value)]
+        counts[label] = counts.get(label, 0) + int(count)
+    return counts, (null | hits) if want_mask else None
+
+
+def _factorized_column(values, numbers, texts, want_mask):
+    # One hashing pass; markers are then matched on the distinct values only
+    codes, uniques = pd.factorize(values)
+    distinct = pd.Series(np.asarray(uniques, dtype=object), dtype=object)
+    kinds = distinct.map(type)
+    is_text = kinds.eq(str).to_numpy()
+    stripped = distinct.where(~is_text, distinct.str.strip() if is_text.any() else distinct)
+    labels = pd.Series(None, index=distinct.index, dtype=object)
+    if texts:
+        named = stripped.isin(texts - {BLANK}) & is_text
+        labels[named] = stripped[named]
+    if BLANK in texts:
+        labels[stripped.eq(BLANK) & is_text] = "blank"
+    if numbers:
+        # Numbers stored as text or in mixed object columns; text is only
+        # parsed when it looks like a number, as failed parses are slow
+        parsable = kinds.isin([int, float]).to_numpy()
+        if is_text.any():
+            parsable |= stripped.str.fullmatch(NUMBER_PATTERN).eq(True).to_numpy() & is_text
+        as_number = pd.to_numeric(stripped[parsable], errors="coerce")
+        number_labels = as_number.map(numbers).reindex(labels.index)
+        unlabelled = labels.isna() & number_labels.notna()
+        labels[unlabelled] = number_labels[unlabelled]
+
+    per_distinct = np.bincount(codes[codes >= 0], minlength=len(distinct))
+    counts = {"null": int((codes < 0).sum())}
+    marked = labels.notna().to_numpy()
+    for label, count in zip(labels[marked], per_distinct[marked]):
+        counts[label] = counts.get(label, 0) + int(count)
+    if not want_mask:
+        return counts, None
+    return counts, np.append(marked, True)[codes]
+
+
+@instrumented
+def count_missing(df, markers=None, column_markers=None, return_mask=False):
+    """
+    Count missing values per column in one vectorized pass: true nulls plus
+    placeholder markers such as -999 or "N.D.". `markers` apply to every column
+    (default DEFAULT_MISSING_MARKERS) and `column_markers` maps column names
+    to marker lists that replace them for that column. Numeric markers also
+    match numbers stored as text, and text markers ignore surrounding
+    whitespace. Cells the loader already read as null, such as "NA" (see
+    null_markers), count as "null".
+
+    Returns a DataFrame with a row per column and counts under "null", each
+    marker and "total", and with `return_mask`, a dictionary of RowBitmaps of
+    the missing rows of each column that has any.
+    """
+    markers = DEFAULT_MISSING_MARKERS if markers is None else markers
+    column_markers = column_markers or {}
+    labels = {}
+    rows = {}
+    masks = {} if return_mask else None
+    for col in df.columns:
+        col_markers = column_markers.get(col, markers)
+        numbers = _numeric_markers(col_markers)
+        texts = {marker for marker in col_markers if isinstance(marker, str)}
+        labels.update(dict.fromkeys(marker_label(marker) for marker in col_markers))
+        values = df[col]
+        if pd.api.types.is_numeric_dtype(values.dtype) and not pd.api.types.is_bool_dtype(
+            values.dtype
+        ):
+            counts, mask = _numeric_column(values, numbers, return_mask)
+        else:
+            counts, mask = _factorized_column(values, numbers, texts, return_mask)
+        rows[col] = counts
+        if return_mask and mask.any():
+            masks[col] = RowBitmap.from_mask(mask)
+
+    labels = ["null", *labels]
+    result = pd.DataFrame(
+        [[counts.get(label, 0) for label in labels] for counts in rows.values()],
+        index=list(rows),
+        columns=labels,
+        dtype="int64",
+    )
+    result["total"] = result.sum(axis=1)
+    return result, masks
+
+
+def parse_column_markers(text):
+    """
+    Read per-column markers, one "column: markers" line per column, such as
+    "Depth_m: -99, blank". A column with nothing after the colon has no markers.
+    """
+    column_markers = {}
+    for line in text.splitlines():
+        column, colon, markers = line.partition(":")
+        if colon and column.strip():
+            column_markers[column.strip()] = parse_markers(markers)
+    return column_markers
+
+
+def marker_records(counts):
+    """
+    Turn count_missing counts into finding records shaped like those of
+    results_to_records, one per column holding placeholder values. True
+    nulls are left to the missing_values check.
+    """
+    records = []
+    markers = counts.drop(columns=["null", "total"])
+    for col, row in markers.iterrows():
+        found = row[row > 0]
+        if len(found):
+            listed = ", ".join(f"{label} ({int(n)})" for label, n in found.items())
+            records.append(
+                {
+                    "check": "missing_markers",
+                    "column": str(col),
+                    "status": "issue",
+                    "detail": f"{int(found.sum())} placeholder values: {listed}",
+                }
+            )
+    return records
@@ -0,0 +1,249 @@
+import math
+import re
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from functions import (
+    EARTH_RADIUS_M,
+    coordinate_values,
+    find_coordinate_columns,
+    find_time_columns,
+    great_circle_distance,
+    record_times,
+)
+from instrumentation import instrumented
+from violations import RowBitmap
+
+# Raster built by build_land_mask.py from Natural Earth land polygons
+LAND_MASK_PATH = Path(__file__).parent / "data" / "land_mask.npz"
+DEFAULT_RESOLUTION = 0.1
+
+# The bundled coastline is generalised by several kilometres, so positions
+# this close to it are never reported as on land
+DEFAULT_COAST_BUFFER_KM = 10.0
+
+DEFAULT_MAX_SPEED_KNOTS = 30.0
+METRES_PER_NAUTICAL_MILE = 1852.0
+
+# Fixes closer in time than this are treated as this far apart, since
+# timestamps are rounded
+MIN_INTERVAL_SECONDS = 60.0
+
+# Fixes with dates but no time of day are only known to the day
+DAY_SECONDS = 86400.0
+
+# Columns identifying the ship or cruise a record belongs to
+TRACK_COLUMN_PATTERN = r"cruise|ship|vessel|platform|track|expocode"
+
+
+class LandMask:
+    """
+    Global land/sea raster of `resolution` degree cells, row 0 at the north
+    pole and column 0 at 180°W. Positions are tested by indexing the raster
+    directly, so millions of them take milliseconds and no polygon is touched.
+    """
+
+    def __init__(self, land, resolution):
+        self.land = land
+        self.resolution = resolution
+
+    @classmethod
+    def load(cls, path=LAND_MASK_PATH):
+        with np.load(path) as data:
+            shape = tuple(int(n) for n in data["shape"])
+            land = np.unpackbits(data["bits"], count=shape[0] * shape[1])
+            return cls(land.reshape(shape).astype(bool), float(data["resolution"]))
+
+    def eroded(self, cells):
+        """
+        Return a mask in which land within `cells` cells of the sea is sea.
+        """
+        land = self.land
+        for _ in range(cells):
+            shrunk = land & np.roll(land, 1, axis=1) & np.roll(land, -1, axis=1)
+            shrunk[1:] &= land[:-1]
+            shrunk[:-1] &= land[1:]
+            land = shrunk
+        return LandMask(land, self.resolution)
+
+    def contains(self, lat, lon):
+        """
+        Return a mask of the positions on land; NaN positions are not.
+        """
+        valid = ~(np.isnan(lat) | np.isnan(lon))
+        n_rows, n_cols = self.land.shape
+        rows = np.clip(((90 - lat[valid]) / self.resolution).astype(np.int64), 0, n_rows - 1)
+        cols = ((lon[valid] + 180) / self.resolution).astype(np.int64) % n_cols
+        on_land = np.zeros(len(lat), dtype=bool)
+        on_land[valid] = self.land[rows, cols]
+        return on_land
+
+
+@lru_cache(maxsize=4)
+def land_mask(coast_buffer_km=DEFAULT_COAST_BUFFER_KM):
+    """
+    Load the bundled land mask once, with land near the coast counted as sea.
+    """
+    mask = LandMask.load()
+    km_per_cell = mask.resolution * math.radians(1) * EARTH_RADIUS_M / 1000
+    return mask.eroded(math.ceil(coast_buffer_km / km_per_cell))
+
+
+def find_track_column(columns):
+    """
+    Locate a column naming the cruise or ship of each record, if any.
+    """
+    return next(
+        (col for col in columns if re.search(TRACK_COLUMN_PATTERN, str(col), re.IGNORECASE)),
+        None,
+    )
+
+
+@instrumented
+def track_speeds(lat, lon, times, tracks=None, min_seconds=MIN_INTERVAL_SECONDS):
+    """
+    Compute the great-circle speed between consecutive fixes of each track,
+    in time order. Rows sharing a fix, such as the levels of one cast, count
+    once, and intervals shorter than `min_seconds` count as `min_seconds`.
+
+    Returns a DataFrame with the first row of the fixes before and after each
+    leg, its distance, duration and speed, and an array giving each row's fix
+    number (-1 for rows without a valid position and time).
+    """
+    tracks = np.zeros(len(lat), dtype=np.int64) if tracks is None else pd.factorize(tracks)[0]
+    stamps = times.astype("datetime64[ns]").astype(np.int64)
+    valid = ~(np.isnan(lat) | np.isnan(lon) | np.isnat(times))
+    rows = np.flatnonzero(valid)
+    # Rows at the same time keep their file order; a change of position
+    # between them is a leg of zero duration
+    rows = rows[np.lexsort((stamps[rows], tracks[rows]))]
+
+    keys = (tracks[rows], stamps[rows], lat[rows], lon[rows])
+    new_fix = np.ones(len(rows), dtype=bool)
+    new_fix[1:] = np.any([key[1:] != key[:-1] for key in keys], axis=0)
+    fix_of_row = np.full(len(lat), -1, dtype=np.int64)
+    fix_of_row[rows] = np.cumsum(new_fix) - 1
+
+    fixes = rows[new_fix]
+    before, after = fixes[:-1], fixes[1:]
+    same_track = tracks[before] == tracks[after]
+    before, after = before[same_track], after[same_track]
+    distance = great_circle_distance(lat[before], lon[before], lat[after], lon[after])
+    seconds = (stamps[after] - stamps[before]) / 1e9
+    speed = distance / np.maximum(seconds, min_seconds) * 3600 / METRES_PER_NAUTICAL_MILE
+    return (
+        pd.DataFrame(
+            {
+                "row": before,
+                "next_row": after,
+                "distance_km": distance / 1000,
+                "hours": seconds / 3600,
+                "speed_knots": speed,
+            }
+        ),
+        fix_of_row,
+    )
+
+
+@instrumented
+def check_plausibility(
+    df, max_speed_knots=DEFAULT_MAX_SPEED_KNOTS, coast_buffer_km=DEFAULT_COAST_BUFFER_KM
+):
+    """
+    Test whether positions are physically plausible: not on land, at least
+    `coast_buffer_km` inland by the bundled mask, and, when a date column is
+    detected, not reached from the previous fix of the same track faster than
+    `max_speed_knots`. Records form one track unless a cruise or ship column
+    is found. When the records have dates but no times of day, fixes on the
+    same day are taken to be a day apart, so speeds are lower bounds. Runs
+    offline.
+
+    Returns a dictionary with the "on_land" row positions and the "jumps"
+    faster than the limit (both None without coordinates, "jumps" also
+    without dates), the number of "legs" compared, whether speeds are
+    "dates_only", the "columns" used (latitude, longitude, date, time,
+    track) and "bitmaps" locating the rows of each finding for the Issue
+    Explorer.
+    """
+    lat_col, lon_col = find_coordinate_columns(df.columns)
+    date_col, time_col = find_time_columns(df.columns)
+    track_col = find_track_column(df.columns)
+    result = {
+        "on_land": None,
+        "jumps": None,
+        "legs": 0,
+        "dates_only": False,
+        "columns": (lat_col, lon_col, date_col, time_col if date_col else None, track_col),
+        "bitmaps": {},
+    }
+    if not (lat_col and lon_col):
+        return result
+
+    lat, lon = coordinate_values(df, lat_col, lon_col)
+    on_land = land_mask(coast_buffer_km).contains(lat, lon)
+    result["on_land"] = np.flatnonzero(on_land)
+    if on_land.any():
+        result["bitmaps"][("on_land", f"{lat_col},{lon_col}")] = RowBitmap.from_mask(on_land)
+
+    if date_col:
+        times = record_times(df, date_col, time_col)
+        known = times[~np.isnat(times)]
+        # Dates that carry a time of day themselves are as precise as any
+        dates_only = time_col is None and not (known - known.astype("datetime64[D]")).any()
+        tracks = df[track_col].to_numpy() if track_col else None
+        legs, fix_of_row = track_speeds(
+            lat, lon, times, tracks, DAY_SECONDS if dates_only else MIN_INTERVAL_SECONDS
+        )
+        result["dates_only"] = dates_only
+        jumps = legs[legs["speed_knots"] > max_speed_knots].reset_index(drop=True)
+        result["legs"] = len(legs)
+        result["jumps"] = jumps
+        if len(jumps):
+            # Every row of the fix reached too fast, e.g. all levels of a cast
+            mask = np.isin(fix_of_row, fix_of_row[jumps["next_row"]])
+            result["bitmaps"][("speed_outliers", f"{lat_col},{lon_col}")] = RowBitmap.from_mask(mask)
+    return result
+
+
+def plausibility_records(
+    result, max_speed_knots=DEFAULT_MAX_SPEED_KNOTS, coast_buffer_km=DEFAULT_COAST_BUFFER_KM
+):
+    """
+    Turn check_plausibility results into finding records shaped like those
+    of results_to_records.
+    """
+    lat_col, lon_col = result["columns"][:2]
+    on_land, jumps = result["on_land"], result["jumps"]
+    records = []
+    if on_land is not None:
+        records.append(
+            {
+                "check": "on_land",
+                "column": f"{lat_col},{lon_col}",
+                "status": "issue" if len(on_land) else "ok",
+                "detail": f"{len(on_land)} rows are on land, more than {coast_buffer_km:g} km from the coast."
+                if len(on_land)
+                else "No positions are on land.",
+            }
+        )
+    if jumps is not None:
+        precision = ""
+        if result["dates_only"]:
+            precision = " Times are known to the day only, so fixes on one day count as a day apart."
+        records.append(
+            {
+                "check": "speed_outliers",
+                "column": f"{lat_col},{lon_col}",
+                "status": "issue" if len(jumps) else "ok",
+                "detail": (
+                    f"{len(jumps)} of {result['legs']} moves between consecutive positions are faster than {max_speed_knots:g} knots."
+                    if len(jumps)
+                    else f"No move between consecutive positions is faster than {max_speed_knots:g} knots."
+                )
+                + precision,
+            }
+        )
+    return records
@@ -0,0 +1,345 @@
+import json
+import re
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+
+from functions import (
+    COLUMN_NAME_PATTERN,
+    COORDINATE_VIOLATION_LABELS,
+    DATE_PATTERN,
+    FORBIDDEN_CHARS,
+    MAX_LATITUDE,
+    MAX_LONGITUDE,
+    TIME_PATTERN,
+    coerce_numeric,
+    is_text_dtype,
+    pattern_mismatches,
+)
+from instrumentation import instrumented
+from violations import RowBitmap
+
+SEVERITIES = ("issue", "info")
+
+# The built-in checks expressed as a rule set, evaluated by violation_bitmaps
+# to locate the failing rows. Row rules flag the rows whose values fail;
+# "name" rules check the column name itself. The coordinate rules are added
+# by coordinate_rules for the detected latitude and longitude columns only.
+DEFAULT_RULE_SET = {
+    "name": "default",
+    "rules": [
+        {
+            "id": "column_name_characters",
+            "columns": ".*",
+            "check": "name",
+            "forbidden": FORBIDDEN_CHARS,
+            "message": "Contains spaces, hyphens, or special characters.",
+        },
+        {
+            "id": "column_name_pattern",
+            "columns": ".*",
+            "check": "name",
+            "pattern": COLUMN_NAME_PATTERN,
+            "message": "Contains characters outside of alphanumeric and underscores.",
+        },
+        {"id": "missing_values", "columns": ".*", "check": "not_null"},
+        {
+            "id": "date_format",
+            "columns": "^date",
+            "check": "pattern",
+            "pattern": DATE_PATTERN,
+            "message": "do not follow ISO 8601 format (YYYY-MM-DD)",
+        },
+        {
+            "id": "time_format",
+            "columns": "^time",
+            "check": "pattern",
+            "pattern": TIME_PATTERN,
+            "message": "do not follow ISO 8601 format (HH:MM[:SS])",
+        },
+    ],
+}
+
+
+def coordinate_rules(lat_col, lon_col):
+    """
+    The built-in coordinate checks as rules for the latitude and longitude
+    columns found by find_coordinate_columns, named after the kinds of
+    coordinate_violations. Both columns are needed, as for the checks.
+    """
+    if not (lat_col and lon_col):
+        return []
+    rules = []
+    for axis, col, limit in (("lat", lat_col, MAX_LATITUDE), ("lon", lon_col, MAX_LONGITUDE)):
+        rules.append({"id": f"{axis}_non_numeric", "column": col, "check": "numeric"})
+        rules.append(
+            {"id": f"{axis}_out_of_range", "column": col, "check": "range", "min": -limit, "max": limit}
+        )
+    rules.append(
+        {"id": "lat_sign_flipped", "column": lat_col, "check": "range", "max": 0, "severity": "info"}
+    )
+    for rule in rules:
+        rule["message"] = COORDINATE_VIOLATION_LABELS[rule["id"]]
+    return rules
+
+
+class ColumnValues:
+    """
+    One column of a table with the intermediate results its rules share,
+    each computed at most once however many rules use it.
+    """
+
+    def __init__(self, values):
+        self.values = values
+
+    @cached_property
+    def missing(self):
+        return self.values.isna().to_numpy(dtype=bool)
+
+    @cached_property
+    def numeric(self):
+        return coerce_numeric(self.values)
+
+    @cached_property
+    def is_text(self):
+        return is_text_dtype(self.values.dtype)
+
+
+def _not_null(column, rule):
+    return column.missing
+
+
+def _pattern(column, rule):
+    return pattern_mismatches(column.values, rule["pattern"])
+
+
+def _numeric(column, rule):
+    return column.numeric[1]
+
+
+def _range(column, rule):
+    numeric = column.numeric[0]
+    failed = np.zeros(len(numeric), dtype=bool)
+    if "min" in rule:
+        failed |= (numeric < rule["min"]).to_numpy(dtype=bool, na_value=False)
+    if "max" in rule:
+        failed |= (numeric > rule["max"]).to_numpy(dtype=bool, na_value=False)
+    return failed
+
+
+def _allowed_values(column, rule):
+    allowed = column.values.isin(rule["values"]).to_numpy(dtype=bool)
+    return ~allowed & ~column.missing
+
+
+# Row checks: each returns a mask of the failing rows of a column, and the
+# default description of those rows
+ROW_CHECKS = {
+    "not_null": (_not_null, "are missing"),
+    "pattern": (_pattern, "do not match the pattern {pattern}"),
+    "numeric": (_numeric, "are not numbers"),
+    "range": (_range, "are outside the range {min} to {max}"),
+    "allowed_values": (_allowed_values, "are not among the allowed values"),
+}
+NAME_CHECKS = ("name",)
+
+
+def validate_rule_set(rule_set):
+    """
+    Check that a rule set is well formed and return it. Raises ValueError
+    naming the first rule that is not.
+    """
+    if not isinstance(rule_set, dict) or not isinstance(rule_set.get("rules"), list):
+        raise ValueError("A rule set must be a mapping with a list of 'rules'.")
+    seen = set()
+    for number, rule in enumerate(rule_set["rules"], start=1):
+        where = f"Rule {rule.get('id', number) if isinstance(rule, dict) else number}"
+        if not isinstance(rule, dict):
+            raise ValueError(f"{where} must be a mapping.")
+        if "id" not in rule:
+            raise ValueError(f"{where} has no 'id'.")
+        if rule["id"] in seen:
+            raise ValueError(f"{where} is defined twice.")
+        seen.add(rule["id"])
+        if rule.get("check") not in ROW_CHECKS and rule.get("check") not in NAME_CHECKS:
+            raise ValueError(
+                f"{where} has unknown check {rule.get('check')!r}; use one of "
+                f"{', '.join([*ROW_CHECKS, *NAME_CHECKS])}."
+            )
+        if ("column" in rule) == ("columns" in rule):
+            raise ValueError(f"{where} needs either 'column' (a name) or 'columns' (a regex).")
+        if rule.get("severity", "issue") not in SEVERITIES:
+            raise ValueError(f"{where} has a severity other than {' or '.join(SEVERITIES)}.")
+        for key in ("columns", "pattern", "forbidden"):
+            if key in rule:
+                try:
+                    re.compile(rule[key])
+                except (re.error, TypeError) as e:
+                    raise ValueError(f"{where} has an invalid {key} regex: {e}") from e
+        if rule["check"] == "pattern" and "pattern" not in rule:
+            raise ValueError(f"{where} needs a 'pattern'.")
+        if rule["check"] == "name" and not ("pattern" in rule or "forbidden" in rule):
+            raise ValueError(f"{where} needs a 'pattern' or 'forbidden' regex.")
+        if rule["check"] == "range":
+            bounds = [rule[key] for key in ("min", "max") if key in rule]
+            if not bounds or not all(isinstance(b, (int, float)) for b in bounds):
+                raise ValueError(f"{where} needs a numeric 'min' and/or 'max'.")
+        if rule["check"] == "allowed_values" and not isinstance(rule.get("values"), list):
+            raise ValueError(f"{where} needs a list of 'values'.")
+    return rule_set
+
+
+def load_rule_set(source):
+    """
+    Read and validate a rule set from a JSON or YAML file, given as a path or
+    an uploaded file. YAML is recognised by a .yaml or .yml name and needs
+    PyYAML. A rule set looks like:
+
+        name: ctd
+        rules:
+          - {id: temperature, column: Temperature_C, check: range, min: -2, max: 40}
+          - {id: salinity_unit, columns: "^salinity", check: name, pattern: "_psu$"}
+          - {id: flags, column: Flag, check: allowed_values, values: [0, 1, 2, 3, 4]}
+
+    Each rule applies to one `column`, or to every column whose name matches
+    the `columns` regex (case-insensitive). Row checks are not_null, pattern,
+    numeric, range (min and/or max) and allowed_values; the name check tests
+    that the column name contains `pattern` and does not contain `forbidden`.
+    Patterns are searched anywhere in a value or name, so anchor them with ^
+    and $ to match the whole of it. Optional keys are
+    `severity` (issue or info), `message` describing the failing rows, and
+    `required` to report a named column that is absent.
+    """
+    name = str(getattr(source, "name", source))
+    content = source.read() if hasattr(source, "read") else Path(source).read_bytes()
+    if name.lower().endswith((".yaml", ".yml")):
+        import yaml
+
+        rule_set = yaml.safe_load(content)
+    else:
+        rule_set = json.loads(content)
+    return validate_rule_set(rule_set)
+
+
+class RulePlan:
+    """
+    A rule set resolved against the columns of a table. Row rules are grouped
+    by column, so evaluation reads each column once and runs all its
+    predicates as vectorized operations on shared intermediates.
+    """
+
+    def __init__(self, name, column_rules, name_rules, absent):
+        self.name = name
+        self.column_rules = column_rules
+        self.name_rules = name_rules
+        self.absent = absent
+
+    def __len__(self):
+        return sum(len(rules) for rules in self.column_rules.values()) + len(self.name_rules)
+
+
+def compile_rules(rule_set, columns):
+    """
+    Compile a validated rule set into a RulePlan for a table with `columns`.
+    """
+    column_rules = {}
+    name_rules = []
+    absent = []
+    for rule in rule_set["rules"]:
+        if "column" in rule:
+            selected = [col for col in columns if str(col) == str(rule["column"])]
+            if not selected and rule.get("required"):
+                absent.append((rule, rule["column"]))
+        else:
+            pattern = re.compile(rule["columns"], re.IGNORECASE)
+            selected = [col for col in columns if pattern.search(str(col))]
+        for col in selected:
+            if rule["check"] in NAME_CHECKS:
+                name_rules.append((rule, col))
+            else:
+                column_rules.setdefault(col, []).append(rule)
+    return RulePlan(rule_set.get("name", "rules"), column_rules, name_rules, absent)
+
+
+def name_violation(rule, column):
+    """
+    Describe why `column` fails a name rule, or return None when it passes.
+    """
+    if "forbidden" in rule and re.search(rule["forbidden"], column):
+        return rule.get("message", f"Contains {rule['forbidden']}.")
+    if "pattern" in rule and not re.search(rule["pattern"], column):
+        return rule.get("message", f"Does not match the pattern {rule['pattern']}.")
+    return None
+
+
+@instrumented
+def evaluate_plan(plan, df):
+    """
+    Evaluate a RulePlan on `df`. Returns finding records shaped like those of
+    results_to_records, with the check named "rule:<id>", and a dictionary of
+    {(check, column): RowBitmap} locating the failing rows of every row rule.
+    """
+    records = []
+    bitmaps = {}
+
+    def add(rule, column, status, detail):
+        records.append(
+            {"check": f"rule:{rule['id']}", "column": str(column), "status": status, "detail": detail}
+        )
+
+    for rule, column in plan.absent:
+        add(rule, column, "issue", "Column is missing.")
+    for rule, column in plan.name_rules:
+        message = name_violation(rule, str(column))
+        add(rule, column, rule.get("severity", "issue") if message else "ok", message or "Name is valid.")
+    for column, rules in plan.column_rules.items():
+        values = ColumnValues(df[column])
+        for rule in rules:
+            if rule["check"] == "pattern" and not values.is_text:
+                add(
+                    rule,
+                    column,
+                    rule.get("severity", "issue"),
+                    "Column is not in a text format (string type required for validation).",
+                )
+                continue
+            predicate, description = ROW_CHECKS[rule["check"]]
+            bitmap = RowBitmap.from_mask(predicate(values, rule))
+            if not len(bitmap):
+                add(rule, column, "ok", "All rows pass.")
+                continue
+            message = rule.get("message") or description.format(
+                pattern=rule.get("pattern"), min=rule.get("min", "-inf"), max=rule.get("max", "inf")
+            )
+            add(rule, column, rule.get("severity", "issue"), f"{len(bitmap)} rows {message}.")
+            bitmaps[(f"rule:{rule['id']}", str(column))] = bitmap
+    return records, bitmaps
+
+
+@instrumented
+def violation_bitmaps(df, results):
+    """
+    Locate the rows behind the findings of run_checks `results` on `df` by
+    evaluating DEFAULT_RULE_SET and the coordinate_rules on the columns they
+    flag: missing values, dates and times not in ISO 8601 format, and
+    coordinate problems. Columns without findings are not scanned again. Returns a dictionary of
+    {(check, column): RowBitmap} with an entry for every column that has
+    failing rows, the check named after its rule.
+    """
+    flagged = set(results["missing_values"].index)
+    flagged.update(results["date_format"][0], results["time_format"][0])
+    lat_col, lon_col = results["coordinates"][2:]
+    for kind, rows in (results.get("coordinate_violations") or {}).items():
+        if len(rows):
+            flagged.add(lat_col if kind.startswith("lat") else lon_col)
+    rule_set = {
+        **DEFAULT_RULE_SET,
+        "rules": DEFAULT_RULE_SET["rules"] + coordinate_rules(lat_col, lon_col),
+    }
+    plan = compile_rules(rule_set, [col for col in df.columns if col in flagged])
+    _, bitmaps = evaluate_plan(plan, df)
+    return {
+        (check.removeprefix("rule:"), column): bitmap
+        for (check, column), bitmap in bitmaps.items()
+    }
@@ -0,0 +1,122 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from functions import (
+    DATE_PATTERN,
+    TIME_PATTERN,
+    is_csv,
+    is_text_dtype,
+    load_data,
+    pattern_mismatches,
+    run_checks,
+)
+from instrumentation import instrumented
+from streaming import run_streaming_checks
+
+DEFAULT_SAMPLE_SIZE = 100_000
+
+# Normal quantile of the two-sided confidence level of the estimated rates
+CONFIDENCE_Z = 1.96
+
+
+@instrumented
+def reservoir_sample(chunks, sample_size, seed=0):
+    """
+    Draw a uniform random sample of at most `sample_size` rows from a stream
+    of DataFrame chunks in one pass. Every row gets a random key and the rows
+    with the smallest keys are kept, so memory stays bounded by the sample
+    plus one chunk. The sample keeps the original row order, with the row
+    numbers of the file as its index, and its `attrs["population_rows"]`
+    holds the number of rows read.
+    """
+    rng = np.random.default_rng(seed)
+    sample, keys, n_rows = None, np.empty(0), 0
+    for chunk in chunks:
+        chunk = chunk.set_axis(pd.RangeIndex(n_rows, n_rows + len(chunk)))
+        n_rows += len(chunk)
+        sample = chunk if sample is None else pd.concat([sample, chunk])
+        keys = np.concatenate([keys, rng.random(len(chunk))])
+        if len(keys) > sample_size:
+            keep = np.sort(np.argpartition(keys, sample_size)[:sample_size])
+            sample, keys = sample.iloc[keep], keys[keep]
+    if sample is None:
+        raise pd.errors.EmptyDataError("No columns to parse from file")
+    sample.attrs["population_rows"] = n_rows
+    return sample
+
+
+def wilson_interval(count, n, z=CONFIDENCE_Z):
+    """
+    Confidence bounds of a rate observed as `count` out of `n` sampled rows.
+    The Wilson score interval stays within [0, 1] and is informative when the
+    count is zero, as it usually is for clean columns.
+    """
+    if n == 0:
+        return 0.0, 1.0
+    rate = count / n
+    denominator = 1 + z**2 / n
+    centre = (rate + z**2 / (2 * n)) / denominator
+    margin = z * np.sqrt(rate * (1 - rate) / n + z**2 / (4 * n**2)) / denominator
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+def estimate_rates(sample, results, n_population):
+    """
+    Estimate the missing and invalid value rates of the whole file from check
+    results on a sample of it. Returns one row per column and problem with the
+    count in the sample, the estimated rate, its confidence bounds and the
+    estimated number of affected rows in the file. When the sample holds the
+    whole file the rates are exact and the bounds collapse onto them.
+    """
+    n = len(sample)
+    missing_values = results["missing_values"]
+    counts = [
+        ("missing_values", col, int(missing_values.get(col, 0))) for col in sample.columns
+    ]
+    # Counted like column_matches judges the columns, ignoring non-string values
+    for check, pattern in (("date_format", DATE_PATTERN), ("time_format", TIME_PATTERN)):
+        issues, valid_columns = results[check]
+        for col in [*issues, *valid_columns]:
+            if col in sample.columns and is_text_dtype(sample[col].dtype):
+                counts.append((check, col, int(pattern_mismatches(sample[col], pattern).sum())))
+    lat_col, lon_col = results["coordinates"][2:]
+    for kind, rows in (results.get("coordinate_violations") or {}).items():
+        col = lat_col if kind.startswith("lat") else lon_col
+        counts.append(("coordinate_violations", f"{col} ({kind})", len(rows)))
+
+    estimates = []
+    for check, column, count in counts:
+        rate = count / n if n else 0.0
+        lower, upper = (rate, rate) if n >= n_population else wilson_interval(count, n)
+        estimates.append(
+            {
+                "check": check,
+                "column": str(column),
+                "sample_count": count,
+                "rate": rate,
+                "lower": lower,
+                "upper": upper,
+                "estimated_rows": round(rate * n_population),
+            }
+        )
+    return pd.DataFrame(
+        estimates,
+        columns=["check", "column", "sample_count", "rate", "lower", "upper", "estimated_rows"],
+    )
+
+
+def verify_full(data, name, sep, enc, sheet_name=0):
+    """
+    Run the exact check suite over a whole file given as bytes, as the
+    background counterpart of a sample preview. CSV files are streamed in
+    chunks so verification memory does not grow with the file.
+    Returns the results dictionary and an error message.
+    """
+    file = io.BytesIO(data)
+    file.name = name
+    if is_csv(name):
+        return run_streaming_checks(file, sep, enc)
+    df, error = load_data(file, None, None, sheet_name=sheet_name)
+    return (run_checks(df) if error is None else None), error
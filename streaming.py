@@ -0,0 +1,276 @@
+import numpy as np
+import pandas as pd
+
+from functions import (
+    DATE_PATTERN,
+    EXCEL_ENGINE,
+    TIME_PATTERN,
+    check_column_names,
+    column_matches,
+    coordinate_report,
+    coordinate_violations,
+    date_format_report,
+    find_coordinate_columns,
+    is_csv,
+    load_error_message,
+    time_format_report,
+)
+from instrumentation import instrumented
+from violations import MAX_SAMPLE_ROWS, RowSample
+
+DEFAULT_CHUNKSIZE = 200_000
+
+
+def iter_chunks(file, sep, enc, chunksize=DEFAULT_CHUNKSIZE, names=None, sheet_name=0):
+    """
+    Yield a CSV file as DataFrame chunks of at most `chunksize` rows.
+    Excel files cannot be streamed by pandas; the sheet `sheet_name` is
+    yielded as a single chunk.
+    With `names`, reading starts at the current position of `file` and every
+    line is data, as when continuing a file whose header was already read.
+    """
+    if is_csv(file.name):
+        header = "infer" if names is None else None
+        with pd.read_csv(
+            file, sep=sep, encoding=enc, chunksize=chunksize, header=header, names=names
+        ) as reader:
+            yield from reader
+    else:
+        yield pd.read_excel(file, sheet_name=sheet_name, engine=EXCEL_ENGINE)
+
+
+def merge_dtypes(left, right):
+    """
+    Combine the dtypes two chunks inferred for the same column into the dtype
+    pandas would have inferred when reading both chunks at once.
+    """
+    if left is None:
+        return right
+    if left == right:
+        return left
+    # Integers widen to float when another chunk contains NaN or decimals
+    if left.kind in "iuf" and right.kind in "iuf":
+        return np.dtype("float64")
+    return np.dtype(object)
+
+
+class MissingValuesAccumulator:
+    """
+    Count null values per column, chunk by chunk.
+    """
+
+    def __init__(self):
+        self.counts = {}
+
+    def update(self, chunk):
+        for col, count in chunk.isnull().sum().items():
+            self.counts[col] = self.counts.get(col, 0) + int(count)
+
+    def merge(self, other):
+        for col, count in other.counts.items():
+            self.counts[col] = self.counts.get(col, 0) + count
+        return self
+
+    def result(self):
+        missing_values = pd.Series(self.counts, dtype="int64")
+        return missing_values[missing_values > 0]
+
+
+class DataTypesAccumulator:
+    """
+    Track the dtype of every column across chunks.
+    """
+
+    def __init__(self):
+        self.dtypes = {}
+
+    def update(self, chunk):
+        for col, dtype in chunk.dtypes.items():
+            self.dtypes[col] = merge_dtypes(self.dtypes.get(col), dtype)
+
+    def merge(self, other):
+        for col, dtype in other.dtypes.items():
+            self.dtypes[col] = merge_dtypes(self.dtypes.get(col), dtype)
+        return self
+
+    def result(self):
+        return pd.Series(self.dtypes, dtype=object)
+
+
+class PatternAccumulator:
+    """
+    Track, per column, whether every non-null string value matches `pattern`.
+    Chunks where pandas read a column as numbers are not matched, but when
+    another chunk makes the column text, a full read holds their values as
+    strings such as "3", which fail the date and time patterns; `result`
+    accounts for them once the column's dtype is known.
+    """
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.all_match = {}
+        self.non_text_values = {}
+
+    def update(self, chunk):
+        for col in chunk.columns:
+            matched = self.all_match.get(col, True)
+            if chunk[col].dtype == object:
+                if matched:
+                    matched = column_matches(chunk[col], self.pattern)
+            elif chunk[col].notna().any():
+                self.non_text_values[col] = True
+            self.all_match[col] = matched
+
+    def merge(self, other):
+        for col, matched in other.all_match.items():
+            self.all_match[col] = self.all_match.get(col, True) and matched
+        for col in other.non_text_values:
+            self.non_text_values[col] = True
+        return self
+
+    def result(self, dtypes):
+        """
+        Return {column: whether all its values match} given the merged `dtypes`.
+        """
+        return {
+            col: matched and not (dtypes[col] == object and self.non_text_values.get(col, False))
+            for col, matched in self.all_match.items()
+        }
+
+
+class CoordinateAccumulator:
+    """
+    Count row-level coordinate violations for the detected latitude and
+    longitude columns, keeping the positions within the whole file of only
+    the first MAX_SAMPLE_ROWS of each kind, so memory does not grow with the
+    file.
+    """
+
+    def __init__(self, lat_col, lon_col):
+        self.lat_col = lat_col
+        self.lon_col = lon_col
+        self.counts = {}
+        self.samples = {}
+
+    def add(self, key, count, rows):
+        self.counts[key] = self.counts.get(key, 0) + count
+        sample = self.samples.get(key, np.empty(0, dtype=np.int64))
+        self.samples[key] = np.concatenate([sample, rows[: MAX_SAMPLE_ROWS - len(sample)]])
+
+    def update(self, chunk, offset):
+        if not (self.lat_col and self.lon_col):
+            return
+        for key, bitmap in coordinate_violations(chunk, self.lat_col, self.lon_col).items():
+            self.add(key, len(bitmap), bitmap.rows(0, MAX_SAMPLE_ROWS) + offset)
+
+    def merge(self, other, offset):
+        for key, count in other.counts.items():
+            self.add(key, count, other.samples[key] + offset)
+        return self
+
+    def result(self):
+        if not (self.lat_col and self.lon_col):
+            return None
+        return {key: RowSample(count, self.samples[key]) for key, count in self.counts.items()}
+
+
+class StreamingChecks:
+    """
+    Run the check suite incrementally over DataFrame chunks. Accumulators from
+    separate runs over consecutive parts of a file can be combined with `merge`,
+    where `other` covers the rows following this one.
+    """
+
+    def __init__(self):
+        self.columns = None
+        self.n_rows = 0
+        self.missing = MissingValuesAccumulator()
+        self.dtypes = DataTypesAccumulator()
+        self.dates = PatternAccumulator(DATE_PATTERN)
+        self.times = PatternAccumulator(TIME_PATTERN)
+        self.coordinates = None
+
+    def update(self, chunk):
+        if self.columns is None:
+            self.columns = chunk.columns
+            self.coordinates = CoordinateAccumulator(
+                *find_coordinate_columns(self.columns)
+            )
+        self.coordinates.update(chunk, self.n_rows)
+        self.n_rows += len(chunk)
+        self.missing.update(chunk)
+        self.dtypes.update(chunk)
+        self.dates.update(chunk)
+        self.times.update(chunk)
+
+    def merge(self, other):
+        if self.columns is None:
+            self.columns = other.columns
+            self.coordinates = other.coordinates
+        elif other.coordinates is not None:
+            self.coordinates.merge(other.coordinates, self.n_rows)
+        self.n_rows += other.n_rows
+        self.missing.merge(other.missing)
+        self.dtypes.merge(other.dtypes)
+        self.dates.merge(other.dates)
+        self.times.merge(other.times)
+        return self
+
+    def results(self):
+        """
+        Return the check results in the same shapes the check_* functions produce.
+        """
+        dtypes = self.dtypes.result()
+
+        def is_text(col):
+            return dtypes[col] == object
+
+        lat_col = self.coordinates.lat_col
+        lon_col = self.coordinates.lon_col
+        coords_found = bool(lat_col and lon_col)
+        violations = self.coordinates.result()
+
+        def no_violations(axis):
+            return coords_found and not any(
+                len(violations[f"{axis}_{kind}"])
+                for kind in ("out_of_range", "missing", "non_numeric")
+            )
+        return {
+            "n_rows": self.n_rows,
+            "column_names": check_column_names(pd.DataFrame(columns=self.columns)),
+            "missing_values": self.missing.result(),
+            "data_types": dtypes,
+            "date_format": date_format_report(
+                self.columns, is_text, self.dates.result(dtypes).get
+            ),
+            "time_format": time_format_report(
+                self.columns, is_text, self.times.result(dtypes).get
+            ),
+            "coordinates": coordinate_report(
+                lat_col,
+                lon_col,
+                no_violations("lat"),
+                no_violations("lon"),
+                coords_found and pd.api.types.is_numeric_dtype(dtypes[lat_col]),
+                coords_found and pd.api.types.is_numeric_dtype(dtypes[lon_col]),
+            ),
+            "coordinate_violations": violations,
+        }
+
+
+@instrumented
+def run_streaming_checks(file, sep, enc, chunksize=DEFAULT_CHUNKSIZE, sheet_name=0):
+    """
+    Read a file chunk by chunk and run all checks without holding it in memory.
+    `sheet_name` selects the sheet of an Excel file. Returns the results
+    dictionary and an error message, mirroring load_data.
+    """
+    checks = StreamingChecks()
+    try:
+        for chunk in iter_chunks(file, sep, enc, chunksize, sheet_name=sheet_name):
+            checks.update(chunk)
+    except Exception as e:
+        return None, load_error_message(e, sep)
+    if checks.columns is None:
+        return None, "The uploaded file does not contain any data."
+    return checks.results(), None
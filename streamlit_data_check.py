@@ -1,16 +1,48 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
 import streamlit as st
 import pandas as pd
-import leafmap.foliumap as leafmap
 
 # Import your functions and CSS
 from functions import (
+    AUTO,
+    CHECK_TASKS,
+    COORDINATE_VIOLATION_LABELS,
+    collect_check_results,
+    find_coordinate_columns,
+    is_csv,
+    iter_check_results,
+    list_excel_sheets,
     load_data,
-    check_column_names,
-    check_missing_values,
-    check_data_types,
-    check_date_format,
-    check_time_format,
-    check_coordinates,
+    load_excel_sheets,
+    resolve_format,
+    results_to_records,
+    run_checks,
+)
+from streaming import DEFAULT_CHUNKSIZE, run_streaming_checks
+from incremental import DEFAULT_STATE_DIR, run_incremental_checks
+from compaction import compact_frame
+from rules import compile_rules, evaluate_plan, load_rule_set, violation_bitmaps
+from missing import (
+    DEFAULT_MISSING_MARKERS,
+    count_missing,
+    marker_label,
+    null_markers,
+    parse_column_markers,
+    parse_markers,
+)
+from duplicates import DEFAULT_NEAR_DISTANCE_M, DEFAULT_NEAR_SECONDS, find_duplicates
+from plausibility import DEFAULT_COAST_BUFFER_KM, DEFAULT_MAX_SPEED_KNOTS, check_plausibility
+from sampling import DEFAULT_SAMPLE_SIZE, estimate_rates, verify_full
+from cache import ResultCache, file_digest
+from instrumentation import Profiler, set_profiler, stage
+from mapping import (
+    CLUSTER_THRESHOLD,
+    DEFAULT_MAX_MAP_POINTS,
+    build_map,
+    downsample_points,
+    prepare_map_points,
 )
 from css import app_css  # Import CSS as a string
 
@@ -19,6 +51,84 @@ st.set_page_config(page_title="Data Quality Reporting", layout="wide")
 # Apply CSS styling
 st.markdown(app_css, unsafe_allow_html=True)
 
+
+
+@st.cache_resource
+def get_result_cache():
+    """
+    Process-wide cache of parsed files and check results, shared across reruns.
+    """
+    return ResultCache()
+
+
+result_cache = get_result_cache()
+
+
+@st.cache_resource
+def get_verifier():
+    """
+    Background worker running full verifications of previewed files, the
+    futures of the verifications it has been given, keyed like the cache,
+    and the lock every session holds while using them.
+    """
+    return ThreadPoolExecutor(max_workers=1), {}, threading.Lock()
+
+
+def full_verification(key, file, sep, enc, sheet_name):
+    """
+    Return the exact (results, error) of a previewed file once its background
+    verification has finished, starting it if needed, or None while it runs.
+    """
+    executor, futures, lock = get_verifier()
+    # Sessions previewing the same file share its future; the result is cached before the future is dropped
+    with lock:
+        if key in result_cache:
+            return result_cache.get(key)
+        if key not in futures:
+            futures[key] = executor.submit(
+                verify_full, file.getvalue(), file.name, sep, enc, sheet_name
+            )
+        if not futures[key].done():
+            return None
+        outcome = futures[key].result()
+        result_cache.put(key, outcome)
+        del futures[key]
+        return outcome
+
+
+def upload_digest(uploaded_file):
+    """
+    Return the content digest of an uploaded file, hashing it only once per
+    upload: Streamlit gives every upload its own file_id, under which the
+    digest is kept in the session across reruns.
+    """
+    file_id = getattr(uploaded_file, "file_id", None)
+    if file_id is None:
+        return file_digest(uploaded_file)
+    digests = st.session_state.setdefault("upload_digests", {})
+    if file_id not in digests:
+        digests[file_id] = file_digest(uploaded_file)
+    return digests[file_id]
+
+
+def compact_loaded(key, loaded):
+    """
+    Compact a (df, error) pair from load_data when compaction is switched on,
+    caching the per-column savings report under `key`.
+    """
+    df, error = loaded
+    if error is None and st.session_state.compact:
+        df, report = compact_frame(df)
+        result_cache.put(key + ("compaction",), report)
+    return df, error
+
+
+# Offending rows shown per coordinate problem
+MAX_VIOLATION_ROWS = 100
+
+# Page sizes offered by the issue explorer
+EXPLORER_PAGE_SIZES = [25, 100, 500]
+
 # Initialize session state variables
 if "uploaded_file" not in st.session_state:
     st.session_state.uploaded_file = None
@@ -48,26 +158,582 @@ else:
     st.session_state.uploaded_file = None
     st.session_state.df = None  # Clear the DataFrame when file is removed
 
-# Separator and encoding options in the sidebar
+# Separator and encoding options in the sidebar; both are detected unless overridden
 st.session_state.separator = st.sidebar.selectbox(
-    "Select CSV Separator", [";", ",", "|", "\t"], index=0
+    "Select CSV Separator",
+    [AUTO, ";", ",", "|", "\t"],
+    index=0,
+    format_func=lambda option: "Auto-detect" if option == AUTO else option,
 )
 st.session_state.encoding = st.sidebar.selectbox(
-    "Select File Encoding", ["utf-8", "ISO-8859-1", "latin1", "cp1252"], index=0
+    "Select File Encoding",
+    [AUTO, "utf-8", "ISO-8859-1", "latin1", "cp1252"],
+    index=0,
+    format_func=lambda option: "Auto-detect" if option == AUTO else option,
+)
+st.session_state.engine = st.sidebar.selectbox(
+    "Parsing engine",
+    ["pandas", "pyarrow"],
+    help="pyarrow parses CSV files on several cores into compact Arrow-backed columns.",
+)
+st.session_state.streaming = st.sidebar.checkbox(
+    "Large file mode (stream in chunks)",
+    help="Read the file in chunks so memory use depends on the chunk size, not the file size. The map is not drawn in this mode.",
+)
+st.session_state.max_map_points = st.sidebar.number_input(
+    "Maximum points on map",
+    min_value=100,
+    value=DEFAULT_MAX_MAP_POINTS,
+    step=10_000,
+    help="Larger point sets are downsampled on a regular grid before drawing.",
+)
+st.session_state.preview = not st.session_state.streaming and st.sidebar.checkbox(
+    "Quick preview (random sample)",
+    help="Check a random sample of the rows first and show estimated rates; the whole file is verified in the background and replaces the estimates when done.",
+)
+st.session_state.compact = not (
+    st.session_state.streaming or st.session_state.preview
+) and st.sidebar.checkbox(
+    "Compact memory after loading",
+    help="Store numbers in the narrowest exact type and repeated text as categories. Check results are unchanged.",
+)
+if st.session_state.preview:
+    st.session_state.sample_size = st.sidebar.number_input(
+        "Rows in sample", min_value=1_000, value=DEFAULT_SAMPLE_SIZE, step=10_000
+    )
+if st.session_state.streaming:
+    st.session_state.chunksize = st.sidebar.number_input(
+        "Rows per chunk", min_value=1_000, value=DEFAULT_CHUNKSIZE, step=50_000
+    )
+    st.session_state.incremental = st.sidebar.checkbox(
+        "Only check appended rows",
+        help="Remember the checks of each CSV file; when a file is re-uploaded with rows appended, only the new rows are parsed.",
+    )
+
+rules_file = st.sidebar.file_uploader(
+    "Custom rule set (JSON or YAML)",
+    type=["json", "yaml", "yml"],
+    help="Per-dataset rules such as value ranges, units and flag vocabularies, checked in addition to the standard checks.",
+)
+rule_set = None
+if rules_file is not None:
+    try:
+        rule_set = load_rule_set(rules_file)
+        rules_digest = upload_digest(rules_file)
+    except Exception as e:
+        st.sidebar.error(f"Could not read the rule set: {e}")
+
+markers_text = st.sidebar.text_input(
+    "Missing value markers",
+    value=", ".join(marker_label(marker) for marker in DEFAULT_MISSING_MARKERS),
+    help='Comma-separated placeholders that mean "no value"; "blank" stands for whitespace-only cells. Empty cells and cells that are exactly "NA", "nan" or another pandas null marker are read as empty and counted as null.',
+)
+column_markers_text = st.sidebar.text_area(
+    "Markers per column",
+    placeholder="Depth_m: -99, blank",
+    help='One "column: markers" line per column, replacing the markers above for that column.',
+)
+near_distance_m = st.sidebar.number_input(
+    "Near-duplicate distance (m)",
+    min_value=1.0,
+    value=DEFAULT_NEAR_DISTANCE_M,
+    step=10.0,
+    help="Distinct positions closer than this, and within the time window below, are reported as near-duplicates.",
+)
+near_seconds = st.sidebar.number_input(
+    "Near-duplicate time window (s)", min_value=1.0, value=DEFAULT_NEAR_SECONDS, step=10.0
+)
+max_speed_knots = st.sidebar.number_input(
+    "Maximum ship speed (knots)",
+    min_value=1.0,
+    value=DEFAULT_MAX_SPEED_KNOTS,
+    step=5.0,
+    help="Moves between consecutive positions faster than this are reported as implausible.",
 )
 
+st.session_state.diagnostics = st.sidebar.checkbox(
+    "Show diagnostics", help="Time every stage and check of this run."
+)
+trace_memory = st.session_state.diagnostics and st.sidebar.checkbox(
+    "Trace peak memory", help="Adds peak memory per stage but slows the checks down. Checks run concurrently, so a peak includes the memory of checks running at the same time."
+)
+
+# Instrumented stages and functions report to this run's profiler, if any
+profiler = Profiler(trace_memory) if st.session_state.diagnostics else None
+set_profiler(profiler)
+
 st.markdown(
     '<h1 class="main-title">Data Quality Reporting</h1>', unsafe_allow_html=True
 )
 
-if st.session_state.uploaded_file:
-    # Load data with error handling
-    df, load_error = load_data(
-        st.session_state.uploaded_file,
-        st.session_state.separator,
-        st.session_state.encoding,
+
+def render_column_names(col_issues):
+    for col, issue in col_issues.items():
+        st.warning(f"Column '{col}': {issue}")
+    if not col_issues:
+        st.success("All column names follow best practices😀.")
+
+
+def render_missing_values(missing_values):
+    if not missing_values.empty:
+        st.write(missing_values)
+    else:
+        st.success("No missing values found😀.")
+
+
+def render_missing_markers(result):
+    counts, _ = result
+    counts = counts[counts["total"] > 0]
+    placeholders = counts.drop(columns=["null", "total"]).to_numpy().sum()
+    if placeholders:
+        st.warning(f"{placeholders:,} cells hold a missing value marker instead of being empty.")
+    if counts.empty:
+        st.success("No missing values or markers found😀.")
+    else:
+        st.dataframe(counts)
+    entered = parse_markers(markers_text)
+    for markers in parse_column_markers(column_markers_text).values():
+        entered += markers
+    folded = null_markers(entered)
+    if folded:
+        st.caption(
+            f"Cells that are exactly {', '.join(dict.fromkeys(folded))} are read as empty, so they are counted as null."
+        )
+
+
+def render_duplicates(result):
+    exact, near = result["exact"], result["near"]
+    lat_col, lon_col, date_col, time_col = result["columns"]
+    # Positions are shown as row labels, which are the file's row numbers in a sample too
+    labels = st.session_state.df.index
+    if len(exact):
+        st.warning(f"{len(exact):,} rows repeat an earlier row exactly.")
+        shown = exact.head(MAX_VIOLATION_ROWS)
+        st.dataframe(
+            shown.assign(row=labels[shown["row"]], duplicate_of=labels[shown["duplicate_of"]]),
+            hide_index=True,
+        )
+    else:
+        st.success("No rows are repeated😀.")
+    if near is None:
+        st.info("Near-duplicates are searched for once latitude and longitude columns are detected.")
+        return
+    within = f"{near_distance_m:g} m"
+    if date_col:
+        within += f" and {near_seconds:g} s"
+    if len(near):
+        st.warning(f"{len(near):,} pairs of distinct positions are within {within} of each other.")
+        shown = near.head(MAX_VIOLATION_ROWS)
+        st.dataframe(
+            shown.assign(row=labels[shown["row"]], other_row=labels[shown["other_row"]]),
+            hide_index=True,
+        )
+    else:
+        st.success(f"No distinct positions are within {within} of each other😀.")
+    used = [col for col in (lat_col, lon_col, date_col, time_col) if col]
+    st.caption(f"Positions compared on {', '.join(repr(col) for col in used)}.")
+
+
+def render_plausibility(result):
+    on_land, jumps = result["on_land"], result["jumps"]
+    lat_col, lon_col, date_col, time_col, track_col = result["columns"]
+    if on_land is None:
+        st.info("Positions are checked once latitude and longitude columns are detected.")
+        return
+    labels = st.session_state.df.index
+    if len(on_land):
+        st.warning(
+            f"{len(on_land):,} rows are on land, more than {DEFAULT_COAST_BUFFER_KM:g} km from the coast."
+        )
+        st.dataframe(st.session_state.df.iloc[on_land[:MAX_VIOLATION_ROWS]])
+    else:
+        st.success("No positions are on land😀.")
+    if jumps is None:
+        st.info("Ship speeds are checked once a date column is detected.")
+    elif len(jumps):
+        st.warning(
+            f"{len(jumps):,} of {result['legs']:,} moves between consecutive positions are "
+            f"faster than {max_speed_knots:g} knots."
+        )
+        shown = jumps.head(MAX_VIOLATION_ROWS)
+        st.dataframe(
+            shown.assign(row=labels[shown["row"]], next_row=labels[shown["next_row"]]),
+            hide_index=True,
+        )
+    else:
+        st.success(f"No move between consecutive positions is faster than {max_speed_knots:g} knots😀.")
+    used = [col for col in (lat_col, lon_col, date_col, time_col) if col]
+    caption = f"Positions checked on {', '.join(repr(col) for col in used)}"
+    st.caption(caption + (f", one track per {track_col!r}." if track_col and date_col else "."))
+    if result["dates_only"]:
+        st.caption(
+            "Times are known to the day only, so positions on the same day are taken to be a day apart and speeds are lower bounds."
+        )
+
+
+def render_data_types(data_types):
+    st.write(data_types)
+
+
+def render_date_format(result):
+    date_issues, valid_date_columns = result
+    for col, issue in date_issues.items():
+        st.warning(f"{issue}")
+    for col in valid_date_columns:
+        st.success(f"Column '{col}' is ISO 8601 (YYYY-MM-DD)😀.")
+
+
+def render_time_format(result):
+    time_issues, valid_time_columns = result
+    for col, issue in time_issues.items():
+        st.warning(f"Column '{col}': {issue}")
+    for col in valid_time_columns:
+        st.success(f"Column '{col}' is ISO 8601 (HH:MM[:SS])😀.")
+
+
+def render_coordinates(result):
+    (coord_issues, success_message, _, _), violations = result
+    if success_message:
+        st.success(success_message)
+    else:
+        for col, issue in coord_issues.items():
+            st.warning(f"{col}: {issue}")
+    for kind, label in COORDINATE_VIOLATION_LABELS.items():
+        rows = (violations or {}).get(kind, [])
+        if len(rows) == 0:
+            continue
+        message = f"{len(rows):,} rows {label}."
+        if kind == "lat_sign_flipped":
+            st.info(message)
+        else:
+            st.warning(message)
+        # Row positions index the full frame, which large file mode does not keep
+        if streaming_results is None:
+            st.dataframe(st.session_state.df.iloc[rows.rows(0, MAX_VIOLATION_ROWS)])
+
+
+def render_rules(result):
+    records, _ = result
+    issues = [record for record in records if record["status"] != "ok"]
+    for record in issues:
+        message = f"{record['check'].removeprefix('rule:')} – {record['column']}: {record['detail']}"
+        if record["status"] == "info":
+            st.info(message)
+        else:
+            st.warning(message)
+    if not issues:
+        st.success("All custom rules pass😀.")
+    st.dataframe(pd.DataFrame(records), hide_index=True)
+
+
+def render_map(map_points):
+    shown_points = downsample_points(map_points, st.session_state.max_map_points)
+    map_style = "Clusters"
+    if len(shown_points) > CLUSTER_THRESHOLD:
+        map_style = st.radio("Map style", ["Clusters", "Heatmap"], horizontal=True)
+    if len(shown_points):
+        build_map(shown_points, map_style).to_streamlit(height=600)
+    if len(shown_points) < len(map_points):
+        st.caption(
+            f"Showing {len(shown_points):,} of {len(map_points):,} unique positions (grid downsampled)."
+        )
+    else:
+        st.caption(f"Showing all {len(map_points):,} unique positions.")
+
+
+# Report sections in page order: title, what failed for error messages, renderer
+CHECK_SECTIONS = {
+    "column_names": ("Column Naming Issues", "checking column names", render_column_names),
+    "missing_values": ("Missing Values", "checking for missing values", render_missing_values),
+    "missing_markers": (
+        "Missing Value Markers",
+        "counting missing value markers",
+        render_missing_markers,
+    ),
+    "data_types": ("Data Types", "displaying data types", render_data_types),
+    "date_format": ("Date Column Format Issues", "checking date formats", render_date_format),
+    "time_format": ("Time Column Format Issues", "checking time formats", render_time_format),
+    "coordinates": (
+        "Coordinate Issues (Latitude and Longitude)",
+        "checking coordinates",
+        render_coordinates,
+    ),
+    "duplicates": ("Duplicate Records", "looking for duplicates", render_duplicates),
+    "plausibility": (
+        "Position Plausibility",
+        "checking position plausibility",
+        render_plausibility,
+    ),
+    "rules": ("Custom Rules", "evaluating the custom rules", render_rules),
+    "map_points": ("Map of Coordinates", "creating the map", render_map),
+}
+
+# Why a section is left out in large file mode
+STREAMING_NOTES = {
+    "missing_markers": "Missing value markers are not counted in large file mode.",
+    "duplicates": "Duplicates are not searched for in large file mode.",
+    "plausibility": "Position plausibility is not checked in large file mode.",
+    "rules": "Custom rules are not evaluated in large file mode.",
+    "map_points": "The map is not drawn in large file mode.",
+}
+
+
+def render_preview_status(sample, verification):
+    """
+    Label preview results as estimates with confidence bounds until the full
+    verification finishes, then rerun the app to show the exact results.
+    Returns the placeholder render_estimates fills in once the checks on the
+    sample have finished, or None when there is nothing to estimate.
+    """
+    st.markdown('<div class="subheader">Preview</div>', unsafe_allow_html=True)
+    with st.expander("Preview", expanded=True):
+        n_population = sample.attrs["population_rows"]
+        if streaming_results is not None:
+            st.success(f"Verified on all {n_population:,} rows; the results below are exact😀.")
+            return None
+        if verification_error:
+            st.error(f"The full verification failed: {verification_error}")
+            return None
+        st.warning(
+            f"Results below are estimated from a random sample of {len(sample):,} of {n_population:,} rows. "
+            "The whole file is being verified in the background and will replace them when done."
+        )
+        placeholder = st.empty()
+        placeholder.caption("Running…")
+
+    @st.fragment(run_every=2)
+    def await_verification():
+        if full_verification(*verification) is not None:
+            st.rerun()
+
+    await_verification()
+    return placeholder
+
+
+def render_estimates(placeholder, sample, sample_results):
+    """
+    Fill the preview's placeholder with the file-wide rates estimated from
+    the results of the checks on the sample.
+    """
+    estimates = estimate_rates(sample, sample_results, sample.attrs["population_rows"])
+    placeholder.dataframe(
+        estimates[(estimates["sample_count"] > 0) | (estimates["check"] != "missing_values")],
+        hide_index=True,
+        column_config={
+            "rate": st.column_config.NumberColumn("Estimated rate", format="%.3f"),
+            "lower": st.column_config.NumberColumn("95% lower", format="%.3f"),
+            "upper": st.column_config.NumberColumn("95% upper", format="%.3f"),
+        },
+    )
+
+
+def render_issue_explorer(bitmaps):
+    """
+    Page through the failing rows of one check and column at a time, jumping
+    to the page holding the first failing row at or after a chosen row.
+    """
+    if not bitmaps:
+        st.success("No failing rows to explore😀.")
+        return
+    key = st.selectbox(
+        "Failing rows of",
+        list(bitmaps),
+        format_func=lambda key: f"{key[0]}: {key[1]} ({len(bitmaps[key]):,} rows)",
+    )
+    bitmap = bitmaps[key]
+    page_col, size_col, jump_col = st.columns(3)
+    page_size = size_col.selectbox("Rows per page", EXPLORER_PAGE_SIZES)
+    n_pages = -(-len(bitmap) // page_size)
+    jump_to = jump_col.number_input(
+        "Jump to row", min_value=0, max_value=bitmap.n_rows - 1, value=None, step=1
+    )
+    default_page = 1 if jump_to is None else min(bitmap.rank(jump_to) // page_size + 1, n_pages)
+    page = page_col.number_input(
+        f"Page (of {n_pages:,})", min_value=1, max_value=n_pages, value=default_page
+    )
+    rows = bitmap.page(page - 1, page_size)
+    st.dataframe(st.session_state.df.iloc[rows])
+    st.caption(
+        f"Failing rows {(page - 1) * page_size + 1:,} to {(page - 1) * page_size + len(rows):,} "
+        f"of {len(bitmap):,}, located from a {bitmap.nbytes / 1024:,.0f} KiB bitmap."
     )
+
+
+def streaming_check_result(results, name):
+    """
+    Pick a section's result out of a large file mode run, shaped like CHECK_TASKS output.
+    """
+    if name == "coordinates":
+        return results["coordinates"], results["coordinate_violations"]
+    return results[name]
+
+
+if st.session_state.uploaded_file:
+    with stage("Load data"):
+        # Detect the separator and encoding from the start of the file if requested
+        if AUTO in (st.session_state.separator, st.session_state.encoding):
+            st.session_state.separator, st.session_state.encoding = resolve_format(
+                st.session_state.uploaded_file,
+                st.session_state.separator,
+                st.session_state.encoding,
+            )
+            if is_csv(st.session_state.uploaded_file.name):
+                st.sidebar.caption(
+                    f"Detected separator {st.session_state.separator!r} and encoding {st.session_state.encoding!r}."
+                )
+        # Excel workbooks: choose the sheets to check and the one shown in detail
+        digest = upload_digest(st.session_state.uploaded_file)
+        selected_sheets = [None]
+        if not is_csv(st.session_state.uploaded_file.name):
+            sheet_names = result_cache.get_or_compute(
+                (digest, "sheets"),
+                lambda: list_excel_sheets(st.session_state.uploaded_file),
+            )
+            selected_sheets = st.sidebar.multiselect(
+                "Sheets to check", sheet_names, default=sheet_names[:1]
+            ) or sheet_names[:1]
+        shown_sheet = selected_sheets[0]
+        if len(selected_sheets) > 1:
+            shown_sheet = st.sidebar.selectbox("Sheet shown below", selected_sheets)
+
+        # Parsed frames and check results are cached by file content and read settings
+        read_key = (
+            digest,
+            st.session_state.separator,
+            st.session_state.encoding,
+            st.session_state.engine,
+            st.session_state.compact,
+        )
+        file_key = read_key + (shown_sheet,)
+        sheet_name = 0 if shown_sheet is None else shown_sheet
+        streaming_results = None
+        verification = None
+        if st.session_state.streaming:
+            # Run every check chunk by chunk and keep only a preview in memory
+            is_csv = is_csv(st.session_state.uploaded_file.name)
+            if st.session_state.incremental and is_csv:
+                streaming_results, load_error = result_cache.get_or_compute(
+                    file_key + ("incremental",),
+                    lambda: run_incremental_checks(
+                        st.session_state.uploaded_file,
+                        st.session_state.separator,
+                        st.session_state.encoding,
+                        DEFAULT_STATE_DIR,
+                        st.session_state.chunksize,
+                    ),
+                )
+            else:
+                streaming_results, load_error = result_cache.get_or_compute(
+                    file_key + ("streaming",),
+                    lambda: run_streaming_checks(
+                        st.session_state.uploaded_file,
+                        st.session_state.separator,
+                        st.session_state.encoding,
+                        st.session_state.chunksize,
+                        sheet_name,
+                    ),
+                )
+            df = None
+            if not load_error:
+                st.session_state.uploaded_file.seek(0)
+                df, load_error = load_data(
+                    st.session_state.uploaded_file,
+                    st.session_state.separator,
+                    st.session_state.encoding,
+                    nrows=6,
+                    sheet_name=sheet_name,
+                )
+        elif st.session_state.preview:
+            # Check a random sample now and verify the whole file in the background
+            df, load_error = result_cache.get_or_compute(
+                file_key + ("sample", st.session_state.sample_size),
+                lambda: load_data(
+                    st.session_state.uploaded_file,
+                    st.session_state.separator,
+                    st.session_state.encoding,
+                    sheet_name=sheet_name,
+                    sample_size=st.session_state.sample_size,
+                ),
+            )
+            if not load_error:
+                verification = (
+                    file_key + ("full",),
+                    st.session_state.uploaded_file,
+                    st.session_state.separator,
+                    st.session_state.encoding,
+                    sheet_name,
+                )
+                streaming_results, verification_error = full_verification(
+                    *verification
+                ) or (None, None)
+        elif shown_sheet is not None:
+            # Load all selected sheets that are not cached yet in parallel
+            uncached_sheets = [
+                sheet
+                for sheet in selected_sheets
+                if read_key + (sheet, "data") not in result_cache
+            ]
+            if uncached_sheets:
+                for sheet, loaded in load_excel_sheets(
+                    st.session_state.uploaded_file, uncached_sheets
+                ).items():
+                    result_cache.put(
+                        read_key + (sheet, "data"),
+                        compact_loaded(read_key + (sheet,), loaded),
+                    )
+            df, load_error = result_cache.get(file_key + ("data",)) or compact_loaded(
+                file_key,
+                load_data(
+                    st.session_state.uploaded_file, None, None, sheet_name=shown_sheet
+                ),
+            )
+        else:
+            # Load data with error handling
+            df, load_error = result_cache.get_or_compute(
+                file_key + ("data",),
+                lambda: compact_loaded(
+                    file_key,
+                    load_data(
+                        st.session_state.uploaded_file,
+                        st.session_state.separator,
+                        st.session_state.encoding,
+                        engine=st.session_state.engine,
+                    ),
+                ),
+            )
     st.session_state.df = df if df is not None else st.session_state.df
+
+    if len(selected_sheets) > 1 and not (
+        st.session_state.streaming or st.session_state.preview
+    ):
+        # Run the check suite on every selected sheet and summarise it
+        st.markdown('<div class="subheader">Sheets</div>', unsafe_allow_html=True)
+        with st.expander("Sheets", expanded=True), stage("Sheets"):
+            sheet_summary = []
+            for sheet in selected_sheets:
+                sheet_df, sheet_error = result_cache.get(read_key + (sheet, "data")) or (
+                    None,
+                    "Sheet was evicted from the cache; select it to reload.",
+                )
+                sheet_results = None
+                if sheet_error is None:
+                    sheet_results = result_cache.get_or_compute(
+                        read_key + (sheet, "checks"), lambda: run_checks(sheet_df)
+                    )
+                sheet_summary.append(
+                    {
+                        "Sheet": sheet,
+                        "Rows": len(sheet_df) if sheet_df is not None else None,
+                        "Issues": sum(
+                            record["status"] == "issue"
+                            for record in results_to_records(sheet_results)
+                        )
+                        if sheet_results
+                        else None,
+                        "Error": sheet_error,
+                    }
+                )
+            st.dataframe(pd.DataFrame(sheet_summary), hide_index=True)
     st.markdown(
         '<div class="subheader">Uploaded Data</div>', unsafe_allow_html=True
     )
@@ -76,140 +742,206 @@ if st.session_state.uploaded_file:
     else:
         # Display data in expanders with error handling
         try:
-            with st.expander("Uploaded Data", expanded=True):
+            with st.expander("Uploaded Data", expanded=True), stage("Uploaded Data"):
                 st.dataframe(st.session_state.df.head(6))
+                if st.session_state.streaming:
+                    st.caption(
+                        f"Streamed {streaming_results['n_rows']:,} rows in chunks of {st.session_state.chunksize:,}."
+                    )
+                    rows_parsed = streaming_results.get("rows_parsed")
+                    if rows_parsed is not None and rows_parsed < streaming_results["n_rows"]:
+                        st.caption(
+                            f"Only {rows_parsed:,} appended rows were parsed; the checks of the "
+                            f"{streaming_results['n_rows'] - rows_parsed:,} rows uploaded before were reused."
+                        )
+                elif st.session_state.preview:
+                    st.caption(
+                        f"Random sample of {len(df):,} of {df.attrs['population_rows']:,} rows."
+                    )
         except Exception as e:
             st.error(f"An error occurred while displaying the data: {e}")
 
-        # Column Naming Issues in an expander
-        try:
+        compaction = result_cache.get(file_key + ("compaction",))
+        if st.session_state.compact and compaction is not None:
             st.markdown(
-                '<div class="subheader">Column Naming Issues</div>',
-                unsafe_allow_html=True,
+                '<div class="subheader">Memory Compaction</div>', unsafe_allow_html=True
             )
-            with st.expander("Column Naming Issues", expanded=True):
-                col_issues = check_column_names(st.session_state.df)
-                for col, issue in col_issues.items():
-                    st.warning(f"Column '{col}': {issue}")
-                if not col_issues:
-                    st.success("All column names follow best practices😀.")
-        except Exception as e:
-            st.error(f"An error occurred while checking column names: {e}")
+            with st.expander("Memory Compaction", expanded=False):
+                st.caption(
+                    f"Compacted from {compaction['bytes_before'].sum() / 1024**2:,.1f} MiB "
+                    f"to {compaction['bytes_after'].sum() / 1024**2:,.1f} MiB."
+                )
+                st.dataframe(compaction, hide_index=True)
 
-        # Missing Values in an expander
-        try:
-            st.markdown(
-                '<div class="subheader">Missing Values</div>', unsafe_allow_html=True
-            )
-            with st.expander("Missing Values", expanded=True):
-                missing_values = check_missing_values(st.session_state.df)
-                if not missing_values.empty:
-                    st.write(missing_values)
-                else:
-                    st.success("No missing values found😀.")
-        except Exception as e:
-            st.error(f"An error occurred while checking for missing values: {e}")
+        estimates_placeholder = None
+        if st.session_state.preview:
+            estimates_placeholder = render_preview_status(df, verification)
 
-        # Data Types in an expander
-        try:
-            st.markdown(
-                '<div class="subheader">Data Types</div>', unsafe_allow_html=True
-            )
-            with st.expander("Data Types", expanded=True):
-                st.write(check_data_types(st.session_state.df))
-        except Exception as e:
-            st.error(f"An error occurred while displaying data types: {e}")
+        # Lay out every section first, then fill each in as its check finishes
+        lat_col, lon_col = find_coordinate_columns(st.session_state.df.columns)
+        st.session_state.lat_col, st.session_state.lon_col = lat_col, lon_col
+        sections = [
+            name
+            for name in CHECK_SECTIONS
+            if name in CHECK_TASKS
+            or (name == "map_points" and not st.session_state.streaming and lat_col and lon_col)
+            or (name == "rules" and not st.session_state.streaming and rule_set is not None)
+            or (name in ("missing_markers", "duplicates", "plausibility") and not st.session_state.streaming)
+        ]
+        progress = st.empty()
+        placeholders = {}
+        for name in CHECK_SECTIONS:
+            if name == "rules" and rule_set is None:
+                continue
+            title = CHECK_SECTIONS[name][0]
+            st.markdown(f'<div class="subheader">{title}</div>', unsafe_allow_html=True)
+            if name not in sections:
+                if st.session_state.streaming:
+                    st.info(STREAMING_NOTES[name])
+                continue
+            with st.expander(title, expanded=True):
+                placeholders[name] = st.empty()
+                placeholders[name].caption("Running…")
 
-        # Date Format Issues in an expander
-        try:
-            st.markdown(
-                '<div class="subheader">Date Column Format Issues</div>',
-                unsafe_allow_html=True,
-            )
-            with st.expander("Date Column Format Issues", expanded=True):
-                date_issues, valid_date_columns = check_date_format(st.session_state.df)
-                for col, issue in date_issues.items():
-                    st.warning(f"{issue}")
-                for col in valid_date_columns:
-                    st.success(f"Column '{col}' is ISO 8601 (YYYY-MM-DD)😀.")
-        except Exception as e:
-            st.error(f"An error occurred while checking date formats: {e}")
+        def show_result(name, result, error):
+            """
+            Render a finished check into its section, or the error it raised.
+            """
+            title, action, render = CHECK_SECTIONS[name]
+            with placeholders[name].container(), stage(title):
+                if error is not None:
+                    st.error(f"An error occurred while {action}: {error}")
+                    return
+                finished[name] = result
+                try:
+                    render(result)
+                except Exception as e:
+                    st.error(f"An error occurred while {action}: {e}")
+                if st.session_state.preview and (
+                    streaming_results is None or name not in CHECK_TASKS
+                ):
+                    verb = "Drawn" if name == "map_points" else "Estimated"
+                    st.caption(f"{verb} from a random sample of {len(df):,} rows.")
 
-        # Time Format Issues in an expander
-        try:
-            st.markdown(
-                '<div class="subheader">Time Column Format Issues</div>',
-                unsafe_allow_html=True,
+        # Results from large file mode, full verification or the cache are shown straight away
+        check_key = file_key
+        if st.session_state.preview:
+            check_key += ("sample", st.session_state.sample_size)
+        section_tasks = {
+            **CHECK_TASKS,
+            "map_points": lambda df: prepare_map_points(df, lat_col, lon_col),
+            "rules": lambda df: evaluate_plan(compile_rules(rule_set, df.columns), df),
+            "missing_markers": lambda df: count_missing(
+                df,
+                parse_markers(markers_text),
+                parse_column_markers(column_markers_text),
+                return_mask=True,
+            ),
+            "duplicates": lambda df: find_duplicates(
+                df, near_distance_m, near_seconds
+            ),
+            "plausibility": lambda df: check_plausibility(df, max_speed_knots),
+        }
+
+        def section_key(name):
+            # Rule, marker, duplicate and plausibility results also depend on the sidebar settings
+            if name == "rules":
+                return check_key + (name, rules_digest)
+            if name == "missing_markers":
+                return check_key + (name, markers_text, column_markers_text)
+            if name == "duplicates":
+                return check_key + (
+                    name,
+                    near_distance_m,
+                    near_seconds,
+                )
+            if name == "plausibility":
+                return check_key + (name, max_speed_knots)
+            return check_key + (name,)
+
+        finished = {}
+        pending = {}
+        for name in sections:
+            if streaming_results is not None and name in CHECK_TASKS:
+                show_result(name, streaming_check_result(streaming_results, name), None)
+            elif section_key(name) in result_cache:
+                show_result(name, result_cache.get(section_key(name)), None)
+            else:
+                pending[name] = section_tasks[name]
+
+        # The remaining checks run concurrently and render as they complete
+        running = [CHECK_SECTIONS[name][0] for name in pending]
+        if running:
+            progress.progress(0.0, text=f"Running: {', '.join(running)}")
+        for done, (name, result, error) in enumerate(
+            iter_check_results(st.session_state.df, pending), start=1
+        ):
+            if error is None:
+                result_cache.put(section_key(name), result)
+            show_result(name, result, error)
+            running.remove(CHECK_SECTIONS[name][0])
+            progress.progress(
+                done / len(pending),
+                text=f"Still running: {', '.join(running)}" if running else "Done",
             )
-            with st.expander("Time Column Format Issues", expanded=True):
-                time_issues, valid_time_columns = check_time_format(st.session_state.df)
-                for col, issue in time_issues.items():
-                    st.warning(f"Column '{col}': {issue}")
-                for col in valid_time_columns:
-                    st.success(f"Column '{col}' is ISO 8601 (HH:MM[:SS])😀.")
-        except Exception as e:
-            st.error(f"An error occurred while checking time formats: {e}")
+        progress.empty()
 
-        # Coordinate Checks in an expander
-        try:
+        # The estimates reuse the sample's section results rather than checking it again
+        if estimates_placeholder is not None:
+            if all(name in finished for name in CHECK_TASKS):
+                render_estimates(
+                    estimates_placeholder,
+                    df,
+                    collect_check_results(df, {name: finished[name] for name in CHECK_TASKS}),
+                )
+            else:
+                estimates_placeholder.caption("No estimates, as a check failed on the sample.")
+
+        # Failing rows are located once per file, then browsed page by page
+        if streaming_results is None and all(name in finished for name in CHECK_TASKS):
             st.markdown(
-                '<div class="subheader">Coordinate Issues (Latitude and Longitude)</div>',
-                unsafe_allow_html=True,
+                '<div class="subheader">Issue Explorer</div>', unsafe_allow_html=True
             )
-            with st.expander(
-                "Coordinate Issues (Latitude and Longitude)", expanded=True
-            ):
-                (
-                    coord_issues,
-                    success_message,
-                    st.session_state.lat_col,
-                    st.session_state.lon_col,
-                ) = check_coordinates(st.session_state.df)
-                if success_message:
-                    st.success(success_message)
-                else:
-                    for col, issue in coord_issues.items():
-                        st.warning(f"{col}: {issue}")
-        except Exception as e:
-            st.error(f"An error occurred while checking coordinates: {e}")
+            with st.expander("Issue Explorer", expanded=False), stage("Issue Explorer"):
+                bitmaps = result_cache.get_or_compute(
+                    check_key + ("bitmaps",),
+                    lambda: violation_bitmaps(
+                        st.session_state.df,
+                        collect_check_results(
+                            st.session_state.df,
+                            {name: finished[name] for name in CHECK_TASKS},
+                        ),
+                    ),
+                )
+                if "rules" in finished:
+                    bitmaps = {**bitmaps, **finished["rules"][1]}
+                if "missing_markers" in finished:
+                    bitmaps = {
+                        **bitmaps,
+                        **{
+                            ("missing_markers", str(col)): bitmap
+                            for col, bitmap in finished["missing_markers"][1].items()
+                        },
+                    }
+                if "duplicates" in finished:
+                    bitmaps = {**bitmaps, **finished["duplicates"]["bitmaps"]}
+                if "plausibility" in finished:
+                    bitmaps = {**bitmaps, **finished["plausibility"]["bitmaps"]}
+                render_issue_explorer(bitmaps)
 
-        # Map visualization in an expander if lat and lon columns are present
+    if profiler is not None:
+        # Timing and memory of every stage of this run
         st.markdown(
-            '<div class="subheader">Map of Coordinates</div>',
-            unsafe_allow_html=True,
+            '<div class="subheader">Diagnostics</div>', unsafe_allow_html=True
         )
-        if st.session_state.lat_col and st.session_state.lon_col:
-            try:
-                with st.expander("Map of Coordinates", expanded=True):
-
-                    unique_map_data = (
-                        st.session_state.df[
-                            [st.session_state.lat_col, st.session_state.lon_col]
-                        ]
-                        .dropna()
-                        .drop_duplicates()
-                    )
-                    m = leafmap.Map(
-                        center=[
-                            unique_map_data[st.session_state.lat_col].mean(),
-                            unique_map_data[st.session_state.lon_col].mean(),
-                        ],
-                        zoom=6,
-                    )
-                    m.add_basemap("Esri.WorldTopoMap")
-                    for _, row in unique_map_data.iterrows():
-                        m.add_marker(
-                            location=[
-                                row[st.session_state.lat_col],
-                                row[st.session_state.lon_col],
-                            ],
-                            shape="circle",
-                            popup=f"Coordinates: {row[st.session_state.lat_col]}, {row[st.session_state.lon_col]}",
-                            radius=5,
-                        )
-                    m.to_streamlit(height=600)
-            except Exception as e:
-                st.error(f"An error occurred while creating the map: {e}")
+        with st.expander("Diagnostics", expanded=False):
+            st.dataframe(profiler.to_frame())
+            st.download_button(
+                "Download diagnostics (JSON)",
+                profiler.to_json(),
+                file_name="diagnostics.json",
+                mime="application/json",
+            )
 else:
     st.info("Please upload a CSV or Excel file to begin the quality checks.")
     # Enhanced placeholder message with instructions and icon
@@ -246,7 +978,7 @@ else:
 
     st.markdown(
         """ 
-        2. **Load Your Data**: Once you have checked the recommendations Upload a CSV file with the correct separator and encoding options in the sidebar.
+        2. **Load Your Data**: Once you have checked the recommendations Upload a CSV file. The separator and encoding are detected automatically; override them in the sidebar if needed.
         3. **Data Quality Checks**: Use the quality check expanders to verify data consistency, including missing values and column naming practices.
         4. **Map Your Data**: Verify the latitude and longitude columns to confirm that location coordinates are accurate.
         """
@@ -0,0 +1,104 @@
+import numpy as np
+
+# Rows covered by each entry of a bitmap's running count; a multiple of 8
+BLOCK_ROWS = 65_536
+
+# Failing rows whose positions a RowSample keeps
+MAX_SAMPLE_ROWS = 1000
+
+# Number of set bits in every possible byte
+POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+
+
+class RowBitmap:
+    """
+    Positions of the failing rows of one column, stored as packed bits: one
+    bit per row, so 20 million rows take 2.5 MB however many of them fail.
+    A running count of failing rows per block of BLOCK_ROWS rows lets `rows`
+    return any page of failing rows by unpacking only the blocks it spans.
+    """
+
+    def __init__(self, bits, n_rows):
+        self.bits = bits
+        self.n_rows = n_rows
+        block_counts = np.add.reduceat(
+            POPCOUNT[bits], np.arange(0, len(bits), BLOCK_ROWS // 8)
+        ) if len(bits) else np.empty(0, dtype=np.int64)
+        # Failing rows before each block, plus the total at the end
+        self.block_starts = np.concatenate([[0], np.cumsum(block_counts)])
+
+    @classmethod
+    def from_mask(cls, mask):
+        return cls(np.packbits(mask), len(mask))
+
+    @classmethod
+    def from_rows(cls, rows, n_rows):
+        mask = np.zeros(n_rows, dtype=bool)
+        mask[rows] = True
+        return cls.from_mask(mask)
+
+    def __len__(self):
+        return int(self.block_starts[-1])
+
+    @property
+    def nbytes(self):
+        return self.bits.nbytes + self.block_starts.nbytes
+
+    def rows(self, start=0, stop=None):
+        """
+        Return the positions of failing rows number `start` to `stop` (exclusive),
+        counted in file order, for use with `df.iloc`.
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        if start >= stop:
+            return np.empty(0, dtype=np.int64)
+        first = np.searchsorted(self.block_starts, start, side="right") - 1
+        last = np.searchsorted(self.block_starts, stop - 1, side="right") - 1
+        block_bytes = BLOCK_ROWS // 8
+        bits = np.unpackbits(self.bits[first * block_bytes : (last + 1) * block_bytes])
+        positions = np.flatnonzero(bits) + first * BLOCK_ROWS
+        skip = start - int(self.block_starts[first])
+        return positions[skip : skip + stop - start]
+
+    def page(self, number, size):
+        """
+        Return the row positions on page `number` (from 0) of `size` failing rows.
+        """
+        return self.rows(number * size, (number + 1) * size)
+
+    def rank(self, position):
+        """
+        Return how many failing rows come before row `position`, i.e. the index
+        of the first failing row at or after it.
+        """
+        position = min(max(position, 0), self.n_rows)
+        block = position // BLOCK_ROWS
+        start = block * BLOCK_ROWS // 8
+        bits = np.unpackbits(self.bits[start : start + BLOCK_ROWS // 8])
+        return int(self.block_starts[block]) + int(bits[: position - block * BLOCK_ROWS].sum())
+
+    def to_mask(self):
+        return np.unpackbits(self.bits, count=self.n_rows).astype(bool)
+
+
+class RowSample:
+    """
+    The number of failing rows of one column and the positions of the first
+    MAX_SAMPLE_ROWS of them, for results that must not grow with the file,
+    such as those of large file mode. Supports len and `rows` like a
+    RowBitmap, for the rows it keeps.
+    """
+
+    def __init__(self, count, sample):
+        self.count = count
+        self.sample = sample
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def nbytes(self):
+        return self.sample.nbytes
+
+    def rows(self, start=0, stop=None):
+        return self.sample[start:stop]